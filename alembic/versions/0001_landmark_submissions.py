@@ -0,0 +1,22 @@
+"""Allow performances without a raw video for client-side landmark submissions
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table("performance_data") as batch:
+        batch.alter_column("raw_video_path", existing_type=sa.String(), nullable=True)
+
+def downgrade():
+    # Landmark-only performances have no raw video and must be removed before this can succeed
+    with op.batch_alter_table("performance_data") as batch:
+        batch.alter_column("raw_video_path", existing_type=sa.String(), nullable=False)
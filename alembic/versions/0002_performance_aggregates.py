@@ -0,0 +1,39 @@
+"""Per-athlete daily/weekly performance aggregates
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import create_index_if_missing, has_table
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if not has_table("performance_aggregates"):
+        op.create_table(
+            "performance_aggregates",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("athlete_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("test_type", sa.String(), nullable=False),
+            sa.Column("period", sa.String(), nullable=False),
+            sa.Column("bucket_start", sa.Date(), nullable=False),
+            sa.Column("attempts", sa.Integer()),
+            sa.Column("scored_attempts", sa.Integer()),
+            sa.Column("score_sum", sa.Float()),
+            sa.Column("best_score", sa.Float()),
+            sa.Column("total_repetitions", sa.Integer()),
+            sa.Column("cheat_count", sa.Integer()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.UniqueConstraint("athlete_id", "test_type", "period", "bucket_start", name="uq_performance_aggregate_bucket")
+        )
+    create_index_if_missing("ix_performance_aggregates_id", "performance_aggregates", ["id"])
+    create_index_if_missing("ix_performance_aggregates_lookup", "performance_aggregates", ["test_type", "period", "bucket_start"])
+
+def downgrade():
+    op.drop_table("performance_aggregates")
@@ -0,0 +1,56 @@
+"""Cohort rank table and indexes for athlete discovery search
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.utils.migrations import create_index_if_missing, has_table
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# users.gender already created the enum type on PostgreSQL
+gender = sa.Enum("MALE", "FEMALE", "OTHER", name="gender").with_variant(
+    postgresql.ENUM("MALE", "FEMALE", "OTHER", name="gender", create_type=False), "postgresql"
+)
+
+def upgrade():
+    create_index_if_missing("ix_athlete_profiles_age", "athlete_profiles", ["age"])
+    create_index_if_missing("ix_athlete_profiles_sport", "athlete_profiles", ["sport"])
+    create_index_if_missing("ix_users_gender", "users", ["gender"])
+    create_index_if_missing("ix_users_location", "users", ["location"])
+
+    if not has_table("athlete_cohort_ranks"):
+        op.create_table(
+            "athlete_cohort_ranks",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("athlete_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("test_type", sa.String(), nullable=False),
+            sa.Column("sport", sa.String()),
+            sa.Column("age", sa.Integer()),
+            sa.Column("age_group", sa.String()),
+            sa.Column("gender", gender),
+            sa.Column("best_score", sa.Float()),
+            sa.Column("percentile", sa.Float()),
+            sa.Column("computed_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.UniqueConstraint("athlete_id", "test_type", name="uq_athlete_cohort_rank")
+        )
+    create_index_if_missing("ix_athlete_cohort_ranks_id", "athlete_cohort_ranks", ["id"])
+    create_index_if_missing(
+        "ix_athlete_cohort_ranks_cohort", "athlete_cohort_ranks",
+        ["test_type", "sport", "gender", "age_group", "percentile"]
+    )
+    create_index_if_missing("ix_athlete_cohort_ranks_percentile", "athlete_cohort_ranks", ["test_type", "percentile"])
+
+def downgrade():
+    op.drop_table("athlete_cohort_ranks")
+    op.drop_index("ix_users_location", table_name="users")
+    op.drop_index("ix_users_gender", table_name="users")
+    op.drop_index("ix_athlete_profiles_sport", table_name="athlete_profiles")
+    op.drop_index("ix_athlete_profiles_age", table_name="athlete_profiles")
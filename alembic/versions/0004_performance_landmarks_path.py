@@ -0,0 +1,23 @@
+"""Stored landmark archive path for overlay rendering
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_column
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if not has_column("performance_data", "landmarks_path"):
+        op.add_column("performance_data", sa.Column("landmarks_path", sa.String()))
+
+def downgrade():
+    with op.batch_alter_table("performance_data") as batch:
+        batch.drop_column("landmarks_path")
@@ -0,0 +1,32 @@
+"""Revision timestamp on performances, used to version cached response bodies
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_column
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # SQLite cannot add a column with a non-constant default, so add, backfill, then set the default
+    if not has_column("performance_data", "updated_at"):
+        op.add_column("performance_data", sa.Column("updated_at", sa.DateTime(timezone=True)))
+    performance_data = sa.table("performance_data", sa.column("updated_at"), sa.column("timestamp"))
+    op.execute(
+        performance_data.update()
+        .where(performance_data.c.updated_at.is_(None))
+        .values(updated_at=performance_data.c.timestamp)
+    )
+    with op.batch_alter_table("performance_data") as batch:
+        batch.alter_column("updated_at", existing_type=sa.DateTime(timezone=True), server_default=sa.func.now())
+
+def downgrade():
+    with op.batch_alter_table("performance_data") as batch:
+        batch.drop_column("updated_at")
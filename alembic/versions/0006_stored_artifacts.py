@@ -0,0 +1,34 @@
+"""Storage tier and location of each performance's raw video, preview and landmarks
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import create_index_if_missing, has_table
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if not has_table("stored_artifacts"):
+        op.create_table(
+            "stored_artifacts",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("performance_id", sa.Integer(), sa.ForeignKey("performance_data.id"), nullable=False),
+            sa.Column("kind", sa.String(), nullable=False),
+            sa.Column("tier", sa.String(), nullable=False),
+            sa.Column("location", sa.String()),
+            sa.Column("size_bytes", sa.Integer()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.UniqueConstraint("performance_id", "kind", name="uq_stored_artifact_kind")
+        )
+    create_index_if_missing("ix_stored_artifacts_id", "stored_artifacts", ["id"])
+    create_index_if_missing("ix_stored_artifacts_performance_id", "stored_artifacts", ["performance_id"])
+
+def downgrade():
+    op.drop_table("stored_artifacts")
@@ -0,0 +1,23 @@
+"""Last batch injury-risk scoring time per athlete
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_column
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if not has_column("athlete_profiles", "injury_risk_updated_at"):
+        op.add_column("athlete_profiles", sa.Column("injury_risk_updated_at", sa.DateTime(timezone=True)))
+
+def downgrade():
+    with op.batch_alter_table("athlete_profiles") as batch:
+        batch.drop_column("injury_risk_updated_at")
@@ -1,15 +1,21 @@
 # app/main.py
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import os
 
+from app.database import Base, engine
+from app.routers import auth, athletes, coaches, admin, gamification, ai_processing
+from app.utils.serialization import FastJSONResponse, GZIP_MINIMUM_SIZE, GZIP_LEVEL
+
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Sports Talent Ecosystem API",
     description="AI-Powered Sports Talent Discovery Platform",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Get frontend URL from environment or use default
@@ -24,6 +30,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large analysis payloads for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_LEVEL)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(athletes.router)
@@ -1,23 +1,29 @@
 
-from sqlalchemy import Column, Integer, String, Float, JSON, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, JSON, DateTime, ForeignKey, Boolean, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
+from app.models.user import Gender
 
 class AthleteProfile(Base):
     __tablename__ = "athlete_profiles"
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True)
-    age = Column(Integer)
-    sport = Column(String)
+    age = Column(Integer, index=True)
+    sport = Column(String, index=True)
     performance_stats = Column(JSON, default={})  # Stores various metrics
     injury_risk = Column(Float)  # 0-1 probability
+    injury_risk_updated_at = Column(DateTime(timezone=True))  # Last batch scoring run
     xp_points = Column(Integer, default=0)
     
     user = relationship("User", back_populates="athlete_profile")
-    performances = relationship("PerformanceData", back_populates="athlete")
-    coach_notes = relationship("CoachNote", back_populates="athlete")
+    performances = relationship(
+        "PerformanceData", primaryjoin="AthleteProfile.user_id == foreign(PerformanceData.athlete_id)", viewonly=True
+    )
+    coach_notes = relationship(
+        "CoachNote", primaryjoin="AthleteProfile.user_id == foreign(CoachNote.athlete_id)", viewonly=True
+    )
 
 class PerformanceData(Base):
     __tablename__ = "performance_data"
@@ -25,12 +31,34 @@ class PerformanceData(Base):
     id = Column(Integer, primary_key=True, index=True)
     athlete_id = Column(Integer, ForeignKey("users.id"))
     test_type = Column(String, nullable=False)  # e.g., "pushups", "sprints"
-    raw_video_path = Column(String, nullable=False)
+    raw_video_path = Column(String)  # Empty for client-side landmark submissions
     processed_video_path = Column(String)  # Optional: video with pose landmarks
+    landmarks_path = Column(String)  # Compressed 33-joint landmark series (.npz)
     ai_score = Column(Float)  # Overall performance score
     metrics = Column(JSON)  # Detailed metrics like speed, accuracy, etc.
     cheat_detected = Column(Boolean, default=False)
     feedback = Column(JSON)  # AI-generated feedback
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())  # Response cache version
     
     athlete = relationship("User", back_populates="performances")
+
+class AthleteCohortRank(Base):
+    """Precomputed score percentile of an athlete within their sport/age group/gender cohort"""
+    __tablename__ = "athlete_cohort_ranks"
+    __table_args__ = (
+        UniqueConstraint("athlete_id", "test_type", name="uq_athlete_cohort_rank"),
+        Index("ix_athlete_cohort_ranks_cohort", "test_type", "sport", "gender", "age_group", "percentile"),
+        Index("ix_athlete_cohort_ranks_percentile", "test_type", "percentile"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    athlete_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    test_type = Column(String, nullable=False)
+    sport = Column(String)
+    age = Column(Integer)
+    age_group = Column(String)  # e.g. "U14", "SENIOR"
+    gender = Column(Enum(Gender))
+    best_score = Column(Float)
+    percentile = Column(Float)  # 0-100 within the cohort
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -15,4 +15,4 @@ class CoachNote(Base):
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     
     coach = relationship("User", foreign_keys=[coach_id], back_populates="coach_notes")
-    athlete = relationship("User", foreign_keys=[athlete_id], back_populates="coach_notes")
+    athlete = relationship("User", foreign_keys=[athlete_id])
@@ -0,0 +1,41 @@
+
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, UniqueConstraint, Index
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.athlete import PerformanceData
+
+class PerformanceAggregate(Base):
+    """Per-athlete daily/weekly rollup of PerformanceData, maintained incrementally"""
+    __tablename__ = "performance_aggregates"
+    __table_args__ = (
+        UniqueConstraint("athlete_id", "test_type", "period", "bucket_start", name="uq_performance_aggregate_bucket"),
+        Index("ix_performance_aggregates_lookup", "test_type", "period", "bucket_start"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    athlete_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    test_type = Column(String, nullable=False)
+    period = Column(String, nullable=False)  # "day" or "week"
+    bucket_start = Column(Date, nullable=False)  # Day, or Monday of the week
+    attempts = Column(Integer, default=0)
+    scored_attempts = Column(Integer, default=0)
+    score_sum = Column(Float, default=0.0)
+    best_score = Column(Float)
+    total_repetitions = Column(Integer, default=0)
+    cheat_count = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class StoredArtifact(Base):
+    """Where a performance's raw video, preview and landmark archive currently live"""
+    __tablename__ = "stored_artifacts"
+    __table_args__ = (
+        UniqueConstraint("performance_id", "kind", name="uq_stored_artifact_kind"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    performance_id = Column(Integer, ForeignKey("performance_data.id"), nullable=False, index=True)
+    kind = Column(String, nullable=False)  # "raw_video", "preview" or "landmarks"
+    tier = Column(String, nullable=False)  # "hot", "cold", "expired" or "pending" while the original is moved
+    location = Column(String)  # Local path or S3 URL; None once expired
+    size_bytes = Column(Integer)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
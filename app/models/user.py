@@ -23,14 +23,14 @@ class User(Base):
     password_hash = Column(String, nullable=False)
     name = Column(String, nullable=False)
     role = Column(Enum(UserRole), nullable=False)
-    gender = Column(Enum(Gender))
-    location = Column(String)
+    gender = Column(Enum(Gender), index=True)
+    location = Column(String, index=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     
     athlete_profile = relationship("AthleteProfile", back_populates="user", uselist=False, cascade="all, delete")
-    coach_notes = relationship("CoachNote", back_populates="coach")
+    coach_notes = relationship("CoachNote", foreign_keys="CoachNote.coach_id", back_populates="coach")
     performances = relationship("PerformanceData", back_populates="athlete")
-    challenges_created = relationship("Challenge", back_populates="created_by")
+    challenges_created = relationship("Challenge", back_populates="created_by_user")
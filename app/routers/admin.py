@@ -0,0 +1,18 @@
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.services.auth import get_current_active_user
+from app.services.rate_limiter import rate_limiter
+from app.models.user import User, UserRole
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+@router.get("/rate-limits")
+def rate_limit_stats(current_user: User = Depends(get_current_active_user)):
+    """Throttled request counters and in-flight analyses"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return rate_limiter.stats()
@@ -1,5 +1,7 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File, Form
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 import shutil
 import os
@@ -9,12 +11,20 @@ from app.services.cloud_storage import save_upload_file
 from app.database import get_db
 from app.services.auth import get_current_active_user
 from app.services.ai_processor import AIProcessor
-from app.services.file_upload import save_upload_file
+from app.services.performance_aggregates import is_plausible, record_performance
+from app.services.video_renderer import render_cache
+from app.services.rate_limiter import rate_limiter
+from app.services.retention import resolve_artifact
 from app.models.performance import PerformanceData
 from app.models.user import User, UserRole
+from app.utils.mediapipe_utils import decode_landmark_array, save_landmark_array, NUM_POSE_LANDMARKS
+from app.services.ai_processor import RENDER_PRESETS
+from app.schemas.performance import PerformanceResponse
+from app.utils.serialization import SerializedBodyCache, dumps
 
 router = APIRouter(prefix="/ai", tags=["ai_processing"])
 ai_processor = AIProcessor()
+performance_body_cache = SerializedBodyCache()  # Keyed by updated_at, so every worker sees edits
 
 @router.post("/process-video/{test_type}")
 async def process_video(
@@ -29,50 +39,179 @@ async def process_video(
             detail="Only athletes can upload performance videos"
         )
     
-    # Save uploaded video
-    video_path = await save_upload_file(video, "videos")
+    async with rate_limiter.analysis_slot("process_video", current_user):
+        # Save uploaded video
+        video_path = await save_upload_file(video, "videos")
+        
+        try:
+            # Process video with AI off the event loop so queued requests keep polling
+            results = await run_in_threadpool(ai_processor.process_video, video_path, test_type)
+            return _save_performance(db, current_user, test_type, results, raw_video_path=video_path)
+            
+        except Exception as e:
+            # Clean up uploaded file if processing fails
+            if os.path.exists(video_path):
+                os.remove(video_path)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Video processing failed: {str(e)}"
+            )
+
+@router.post("/process-landmarks/{test_type}")
+async def process_landmarks(
+    test_type: str,
+    landmarks: UploadFile = File(...),
+    frames: int = Form(...),
+    joints: int = Form(NUM_POSE_LANDMARKS),
+    fps: float = Form(30.0),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Score pose landmarks estimated on-device, skipping server-side video inference"""
+    if current_user.role != UserRole.ATHLETE:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only athletes can upload performance data"
+        )
     
     try:
-        # Process video with AI
-        results = ai_processor.process_video(video_path, test_type)
-        
-        # Save performance data to database
-        performance = PerformanceData(
-            athlete_id=current_user.id,
-            test_type=test_type,
-            raw_video_path=video_path,
-            ai_score=results.get("ai_score"),
-            metrics=results.get("metrics", {}),
-            cheat_detected=results.get("cheat_detected", False),
-            feedback=results.get("feedback", [])
+        landmark_array = decode_landmark_array(await landmarks.read(), frames, joints)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid landmark data: {str(e)}"
         )
-        
-        db.add(performance)
-        db.commit()
-        db.refresh(performance)
-        
-        # Update athlete's XP points
-        if results.get("ai_score", 0) > 0:
-            athlete_profile = current_user.athlete_profile
-            xp_earned = int(results["ai_score"] / 10)  # 1 XP per 10 score points
-            athlete_profile.xp_points += xp_earned
-            db.commit()
-        
-        return {
-            "success": True,
-            "performance_id": performance.id,
-            "score": results.get("ai_score"),
-            "repetitions": results.get("metrics", {}).get("repetitions", 0),
-            "feedback": results.get("feedback", []),
-            "xp_earned": xp_earned
-        }
-        
+    
+    async with rate_limiter.analysis_slot("process_landmarks", current_user):
+        try:
+            results = await run_in_threadpool(ai_processor.process_landmarks, landmark_array, test_type, fps)
+            return _save_performance(db, current_user, test_type, results, raw_video_path=None)
+            
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Landmark processing failed: {str(e)}"
+            )
+
+@router.get("/performances/{performance_id}", response_model=PerformanceResponse)
+def get_performance(
+    performance_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Serve a performance record, serializing and compressing it once per revision"""
+    row = db.query(PerformanceData.athlete_id, PerformanceData.updated_at).filter(
+        PerformanceData.id == performance_id
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Performance not found")
+    athlete_id, updated_at = row
+    if current_user.role == UserRole.ATHLETE and athlete_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to view this performance"
+        )
+    
+    cached = performance_body_cache.get(performance_id, updated_at)
+    if cached is None:
+        performance = db.query(PerformanceData).filter(PerformanceData.id == performance_id).first()
+        body = dumps(PerformanceResponse.from_orm(performance).dict())
+        cached = performance_body_cache.set(performance_id, performance.updated_at, body)
+    return cached.response(request.headers.get("accept-encoding", ""))
+
+@router.get("/performances/{performance_id}/processed-video")
+def processed_video(
+    performance_id: int,
+    preset: str = "low",
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Serve the landmark-overlay video, rendering and caching it on first request"""
+    if preset not in RENDER_PRESETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Preset must be one of: {', '.join(RENDER_PRESETS)}"
+        )
+    
+    performance = db.query(PerformanceData).filter(PerformanceData.id == performance_id).first()
+    if performance is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Performance not found")
+    if current_user.role == UserRole.ATHLETE and performance.athlete_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to view this performance"
+        )
+    rate_limiter.check("processed_video", f"user:{current_user.id}", current_user.role)
+    
+    raw_video_path = resolve_artifact(db, performance, "raw_video")
+    landmarks_path = resolve_artifact(db, performance, "landmarks")
+    if not raw_video_path or not landmarks_path:
+        # Originals past retention only keep a low-bitrate preview
+        preview_path = resolve_artifact(db, performance, "preview")
+        if preview_path:
+            return FileResponse(preview_path, media_type="video/mp4")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No video and landmarks stored for this performance"
+        )
+    
+    try:
+        video_path = render_cache.get_or_render(performance, preset, ai_processor, raw_video_path, landmarks_path)
     except Exception as e:
-        # Clean up uploaded file if processing fails
-        if os.path.exists(video_path):
-            os.remove(video_path)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Video processing failed: {str(e)}"
+            detail=f"Video rendering failed: {str(e)}"
         )
+    
+    # Renders are per preset and may be evicted, so record the stable endpoint instead of a cache file
+    endpoint = f"{router.prefix}/performances/{performance.id}/processed-video"
+    if performance.processed_video_path != endpoint:
+        performance.processed_video_path = endpoint
+        db.commit()
+    
+    return FileResponse(video_path, media_type="video/mp4")
 
+def _save_performance(db: Session, current_user: User, test_type: str, results: dict, raw_video_path):
+    """Persist analysis results and award XP to the athlete"""
+    landmark_array = results.get("landmark_array")
+    performance = PerformanceData(
+        athlete_id=current_user.id,
+        test_type=test_type,
+        raw_video_path=raw_video_path,
+        landmarks_path=save_landmark_array(landmark_array) if landmark_array is not None else None,
+        ai_score=results.get("ai_score"),
+        metrics=results.get("metrics", {}),
+        cheat_detected=results.get("cheat_detected", False),
+        feedback=results.get("feedback", [])
+    )
+    
+    db.add(performance)
+    db.commit()
+    db.refresh(performance)
+    
+    plausible = is_plausible(performance)
+    if plausible:
+        try:
+            record_performance(db, performance)
+        except Exception as e:
+            # The performance is already saved; aggregates can be rebuilt later
+            db.rollback()
+            print(f"Failed to update aggregates for performance {performance.id}: {e}")
+    
+    # Update athlete's XP points
+    xp_earned = 0
+    if plausible and results.get("ai_score", 0) > 0:
+        athlete_profile = current_user.athlete_profile
+        xp_earned = int(results["ai_score"] / 10)  # 1 XP per 10 score points
+        athlete_profile.xp_points += xp_earned
+        db.commit()
+    
+    return {
+        "success": True,
+        "performance_id": performance.id,
+        "score": results.get("ai_score"),
+        "repetitions": results.get("metrics", {}).get("repetitions", 0),
+        "feedback": results.get("feedback", []),
+        "xp_earned": xp_earned
+    }
@@ -0,0 +1,50 @@
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.database import get_db
+from app.services.auth import get_current_active_user
+from app.services.athlete_search import search_athletes
+from app.schemas.athlete import AthleteSearchResult
+from app.models.user import User, UserRole, Gender
+
+router = APIRouter(prefix="/athletes", tags=["athletes"])
+
+@router.get("/search", response_model=List[AthleteSearchResult])
+def search(
+    test_type: str = "pushups",
+    sport: Optional[str] = None,
+    gender: Optional[Gender] = None,
+    age_group: Optional[str] = None,
+    min_age: Optional[int] = Query(None, ge=0),
+    max_age: Optional[int] = Query(None, ge=0),
+    location: Optional[str] = None,
+    min_percentile: Optional[float] = Query(None, ge=0, le=100),
+    max_injury_risk: Optional[float] = Query(None, ge=0, le=1),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Discover athletes ranked by score percentile within their sport/age/gender cohort"""
+    if current_user.role not in (UserRole.COACH, UserRole.ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only coaches can search athletes"
+        )
+
+    return search_athletes(
+        db,
+        test_type=test_type,
+        sport=sport,
+        gender=gender,
+        age_group=age_group,
+        min_age=min_age,
+        max_age=max_age,
+        location=location,
+        min_percentile=min_percentile,
+        max_injury_risk=max_injury_risk,
+        limit=limit,
+        offset=offset
+    )
@@ -11,6 +11,7 @@ from app.services.auth import (
     get_current_active_user, get_password_hash
 )
 from app.models.user import User
+from app.services.rate_limiter import login_rate_limit
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -48,7 +49,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     
     return db_user
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(login_rate_limit)])
 def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     user = authenticate_user(db, form_data.username, form_data.password)
     if not user:
@@ -0,0 +1,49 @@
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import List, Optional
+
+from app.database import get_db
+from app.services.auth import get_current_active_user
+from app.services.performance_aggregates import get_athlete_trends, PERIODS
+from app.schemas.performance import AthleteTrend
+from app.models.user import User, UserRole
+
+router = APIRouter(prefix="/coaches", tags=["coaches"])
+
+MAX_COMPARED_ATHLETES = 50
+
+@router.get("/dashboard/trends", response_model=List[AthleteTrend])
+def athlete_trends(
+    athlete_ids: List[int] = Query(...),
+    test_type: str = "pushups",
+    period: str = "week",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    rolling_window: int = Query(4, ge=1, le=52),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Compare performance trends across athletes using precomputed aggregates"""
+    if current_user.role not in (UserRole.COACH, UserRole.ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only coaches can view athlete dashboards"
+        )
+    if period not in PERIODS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Period must be one of: {', '.join(PERIODS)}"
+        )
+    if len(athlete_ids) > MAX_COMPARED_ATHLETES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_COMPARED_ATHLETES} athletes can be compared at once"
+        )
+
+    trends = get_athlete_trends(db, athlete_ids, test_type, period, start, end, rolling_window)
+    return [
+        {"athlete_id": athlete_id, "test_type": test_type, "period": period, "points": points}
+        for athlete_id, points in trends.items()
+    ]
@@ -0,0 +1,17 @@
+
+from pydantic import BaseModel
+from typing import Optional
+from app.models.user import Gender
+
+class AthleteSearchResult(BaseModel):
+    athlete_id: int
+    name: str
+    sport: Optional[str] = None
+    age: Optional[int] = None
+    age_group: Optional[str] = None
+    gender: Optional[Gender] = None
+    location: Optional[str] = None
+    test_type: str
+    best_score: Optional[float] = None
+    percentile: Optional[float] = None
+    injury_risk: Optional[float] = None
@@ -1,7 +1,7 @@
 
 from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional, Dict, Any
+from datetime import date, datetime
+from typing import Optional, Dict, Any, List
 
 class PerformanceBase(BaseModel):
     test_type: str
@@ -15,8 +15,23 @@ class PerformanceResponse(PerformanceBase):
     ai_score: Optional[float] = None
     metrics: Optional[Dict[str, Any]] = None
     cheat_detected: bool
-    feedback: Optional[Dict[str, Any]] = None
+    feedback: Optional[List[str]] = None  # Stored as a list of messages
     timestamp: datetime
     
     class Config:
         orm_mode = True
+
+class PerformanceTrendPoint(BaseModel):
+    bucket_start: date
+    attempts: int
+    best_score: Optional[float] = None
+    average_score: Optional[float] = None
+    rolling_average_score: Optional[float] = None
+    total_repetitions: int
+    cheat_count: int
+
+class AthleteTrend(BaseModel):
+    athlete_id: int
+    test_type: str
+    period: str
+    points: List[PerformanceTrendPoint]
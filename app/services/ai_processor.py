@@ -6,6 +6,29 @@ import tempfile
 from typing import Dict, Any
 import os
 
+from app.utils.mediapipe_utils import (
+    to_landmark_frames, detected_frame_mask, landmarks_to_array, empty_landmark_frame
+)
+
+# Server-side plausibility thresholds for client-submitted landmarks
+MIN_CLIENT_FPS = 10
+MAX_CLIENT_FPS = 120
+MAX_JOINT_SPEED = 3.0  # Normalized units per second (0.1 per frame at 30 fps)
+MIN_JOINT_VISIBILITY = 0.5  # Occluded joints are too noisy to judge
+SCORED_JOINTS = [11, 12, 13, 14, 15, 16, 23, 24]  # Shoulders, elbows, wrists and hips used for scoring
+MIN_SCORED_JOINT_VISIBILITY_SHARE = 0.5  # Below this the checks would see too little of the scored motion
+MIN_REP_SECONDS = 0.5  # Faster than any real full-range pushup
+MAX_BONE_LENGTH_VARIATION = 0.35  # Coefficient of variation of arm segment lengths
+MIN_LANDMARK_JITTER = 1e-5  # Real pose estimators always produce some frame-to-frame noise
+
+# Overlay video presets: output height and frame rate
+RENDER_PRESETS = {
+    "preview": {"height": 240, "fps": 10},
+    "low": {"height": 360, "fps": 15},
+    "medium": {"height": 480, "fps": 24},
+    "high": {"height": 720, "fps": 30}
+}
+
 class AIProcessor:
     def __init__(self):
         self.mp_pose = mp.solutions.pose
@@ -31,6 +54,7 @@ class AIProcessor:
             "cheat_detected": False
         }
         
+        frame_landmarks = []  # Full 33-joint series, kept for overlay rendering
         frame_count = 0
         while cap.isOpened():
             success, image = cap.read()
@@ -42,11 +66,10 @@ class AIProcessor:
             pose_results = self.pose.process(image_rgb)
             
             if pose_results.pose_landmarks:
-                results["landmarks"].append(self._extract_keypoints(pose_results.pose_landmarks))
-                
-                # Test-specific analysis
-                if test_type == "pushups":
-                    self._analyze_pushup(image, pose_results.pose_landmarks, results, frame_count)
+                frame_landmarks.append(landmarks_to_array(pose_results.pose_landmarks))
+                self._analyze_frame(image, pose_results.pose_landmarks, test_type, results, frame_count)
+            else:
+                frame_landmarks.append(empty_landmark_frame())
                 
             frame_count += 1
             
@@ -54,10 +77,158 @@ class AIProcessor:
         
         # Calculate final metrics
         results["frames_processed"] = frame_count
+        if frame_landmarks:
+            results["landmark_array"] = np.stack(frame_landmarks)
+        self._calculate_final_metrics(results, test_type)
+        
+        return results
+    
+    def process_landmarks(self, landmark_array: np.ndarray, test_type: str, fps: float) -> Dict[str, Any]:
+        """
+        Analyze a client-side landmark array (frames x 33 x 4) without decoding video
+        """
+        results = {
+            "frames_processed": 0,
+            "landmarks": [],
+            "metrics": {},
+            "feedback": [],
+            "cheat_detected": False
+        }
+        
+        for frame_count, frame_landmarks in enumerate(to_landmark_frames(landmark_array)):
+            if frame_landmarks is not None:
+                self._analyze_frame(None, frame_landmarks, test_type, results, frame_count)
+        
+        results["frames_processed"] = len(landmark_array)
+        results["landmark_array"] = landmark_array
+        self._check_landmark_plausibility(landmark_array, fps, results)
         self._calculate_final_metrics(results, test_type)
         
         return results
     
+    def render_overlay(self, video_path: str, landmark_array: np.ndarray, output_path: str, preset: str = "low"):
+        """
+        Draw stored pose landmarks onto the raw video, downscaled to a render preset
+        """
+        from mediapipe.framework.formats import landmark_pb2
+        
+        options = RENDER_PRESETS[preset]
+        cap = cv2.VideoCapture(video_path)
+        source_fps = cap.get(cv2.CAP_PROP_FPS) or options["fps"]
+        stride = max(1, int(round(source_fps / options["fps"])))
+        writer = None
+        
+        try:
+            frame_count = 0
+            while cap.isOpened():
+                success, image = cap.read()
+                if not success:
+                    break
+                
+                if frame_count % stride == 0:
+                    height, width = image.shape[:2]
+                    if height > options["height"]:
+                        width = int(width * options["height"] / height) // 2 * 2
+                        height = options["height"]
+                        image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+                    
+                    if writer is None:
+                        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+                        writer = cv2.VideoWriter(output_path, fourcc, source_fps / stride, (width, height))
+                    
+                    if frame_count < len(landmark_array) and not np.isnan(landmark_array[frame_count]).all():
+                        pose_landmarks = landmark_pb2.NormalizedLandmarkList(landmark=[
+                            landmark_pb2.NormalizedLandmark(x=x, y=y, z=z, visibility=visibility)
+                            for x, y, z, visibility in landmark_array[frame_count].tolist()
+                        ])
+                        self.mp_drawing.draw_landmarks(image, pose_landmarks, self.mp_pose.POSE_CONNECTIONS)
+                    
+                    writer.write(image)
+                frame_count += 1
+        finally:
+            cap.release()
+            if writer is not None:
+                writer.release()
+        
+        if writer is None:
+            raise ValueError("Raw video contains no readable frames")
+    
+    def _analyze_frame(self, image, landmarks, test_type, results, frame_count):
+        """Record keypoints and run test-specific analysis for one frame"""
+        results["landmarks"].append(self._extract_keypoints(landmarks))
+        
+        # Test-specific analysis
+        if test_type == "pushups":
+            self._analyze_pushup(image, landmarks, results, frame_count)
+    
+    def _check_landmark_plausibility(self, landmark_array, fps, results):
+        """Flag client-submitted landmarks that could not have come from a real capture"""
+        flags = []
+        
+        if not MIN_CLIENT_FPS <= fps <= MAX_CLIENT_FPS:
+            flags.append("implausible_frame_rate")
+        
+        detected = landmark_array[detected_frame_mask(landmark_array)]
+        if len(detected) == 0:
+            flags.append("no_pose_detected")
+        elif not np.isfinite(detected).all():
+            flags.append("non_finite_values")
+        else:
+            coords = detected[:, :, :2]
+            visibility = detected[:, :, 3]
+            if (coords < -0.5).any() or (coords > 1.5).any():
+                flags.append("coordinates_out_of_range")
+            if (visibility < 0).any() or (visibility > 1).any():
+                flags.append("visibility_out_of_range")
+            
+            # The motion checks below only trust visible joints, so the scored joints must mostly be visible
+            if (visibility[:, SCORED_JOINTS] > MIN_JOINT_VISIBILITY).mean() < MIN_SCORED_JOINT_VISIBILITY_SHARE:
+                flags.append("scored_joints_occluded")
+            
+            # Visible joints teleporting between adjacent detected frames
+            visible = np.nan_to_num(landmark_array[:, :, 3], nan=0.0) > MIN_JOINT_VISIBILITY
+            tracked = visible[1:] & visible[:-1]
+            steps = np.linalg.norm(np.diff(landmark_array[:, :, :2], axis=0), axis=2)
+            if (steps[tracked] > MAX_JOINT_SPEED / max(fps, MIN_CLIENT_FPS)).any():
+                flags.append("joint_teleport")
+            
+            if len(detected) > 2:
+                # Perfectly smooth trajectories are a sign of synthetic data
+                jitter = np.diff(coords, n=2, axis=0)
+                if np.std(jitter) < MIN_LANDMARK_JITTER:
+                    flags.append("synthetic_motion")
+            
+            # Arm segments should keep a roughly constant length
+            for a, b in [(11, 13), (13, 15), (12, 14), (14, 16)]:
+                both_visible = (detected[:, a, 3] > MIN_JOINT_VISIBILITY) & (detected[:, b, 3] > MIN_JOINT_VISIBILITY)
+                if both_visible.sum() < 2:
+                    continue
+                lengths = np.linalg.norm(detected[both_visible, a, :2] - detected[both_visible, b, :2], axis=1)
+                if lengths.mean() > 0 and lengths.std() / lengths.mean() > MAX_BONE_LENGTH_VARIATION:
+                    flags.append("inconsistent_bone_length")
+                    break
+        
+        if self._shortest_rep_frames(results) < MIN_REP_SECONDS * fps:
+            flags.append("implausible_rep_cadence")
+        
+        results["metrics"]["plausibility_flags"] = flags
+        if flags:
+            results["cheat_detected"] = True
+            results["feedback"].append("Submitted landmark data failed verification checks")
+    
+    def _shortest_rep_frames(self, results):
+        """Fewest frames any counted repetition took, from starting the descent to reaching the top"""
+        shortest = float("inf")
+        start = None
+        previous = "top"
+        for phase in results["metrics"].get("phases", []):
+            if phase["phase"] == "descending" and previous == "top":
+                start = phase["frame"]
+            elif phase["phase"] == "top" and previous == "ascending" and start is not None:
+                shortest = min(shortest, phase["frame"] - start)
+            previous = phase["phase"]
+        return shortest
+    
     def _extract_keypoints(self, landmarks):
         """Extract key pose landmarks"""
         keypoints = {}
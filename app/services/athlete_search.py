@@ -0,0 +1,137 @@
+
+from typing import List, Optional
+from sqlalchemy import case, func, insert
+from sqlalchemy.orm import Session
+
+from app.models.athlete import AthleteProfile, AthleteCohortRank
+from app.models.performance import PerformanceAggregate
+from app.models.user import User, Gender
+
+# (max age, label) bands used to form comparison cohorts
+AGE_GROUPS = [(11, "U12"), (13, "U14"), (15, "U16"), (17, "U18"), (20, "U21")]
+SENIOR_AGE_GROUP = "SENIOR"
+UNKNOWN_AGE_GROUP = "UNKNOWN"
+
+def _age_group_expression(age_column):
+    """SQL CASE mapping an age column onto AGE_GROUPS labels"""
+    return case(
+        (age_column.is_(None), UNKNOWN_AGE_GROUP),
+        *[(age_column <= max_age, label) for max_age, label in AGE_GROUPS],
+        else_=SENIOR_AGE_GROUP
+    )
+
+def rebuild_cohort_ranks(db: Session) -> int:
+    """Recompute every athlete's cohort percentile in a single set-based statement"""
+    best_scores = db.query(
+        PerformanceAggregate.athlete_id.label("athlete_id"),
+        PerformanceAggregate.test_type.label("test_type"),
+        func.max(PerformanceAggregate.best_score).label("best_score")
+    ).filter(
+        PerformanceAggregate.period == "week",
+        PerformanceAggregate.best_score.isnot(None)
+    ).group_by(PerformanceAggregate.athlete_id, PerformanceAggregate.test_type).subquery()
+
+    age_group = _age_group_expression(AthleteProfile.age)
+    # Share of the cohort scoring at or below the athlete, so a cohort of one ranks at 100
+    percentile = func.cume_dist().over(
+        partition_by=(best_scores.c.test_type, AthleteProfile.sport, age_group, User.gender),
+        order_by=best_scores.c.best_score
+    ) * 100
+
+    ranked = db.query(
+        best_scores.c.athlete_id,
+        best_scores.c.test_type,
+        AthleteProfile.sport,
+        AthleteProfile.age,
+        age_group,
+        User.gender,
+        best_scores.c.best_score,
+        percentile
+    ).join(
+        AthleteProfile, AthleteProfile.user_id == best_scores.c.athlete_id
+    ).join(
+        User, User.id == best_scores.c.athlete_id
+    )
+
+    db.query(AthleteCohortRank).delete(synchronize_session=False)
+    result = db.execute(insert(AthleteCohortRank.__table__).from_select(
+        ["athlete_id", "test_type", "sport", "age", "age_group", "gender", "best_score", "percentile"],
+        ranked.statement
+    ))
+    db.commit()
+    return result.rowcount
+
+def search_athletes(
+    db: Session,
+    test_type: str,
+    sport: Optional[str] = None,
+    gender: Optional[Gender] = None,
+    age_group: Optional[str] = None,
+    min_age: Optional[int] = None,
+    max_age: Optional[int] = None,
+    location: Optional[str] = None,
+    min_percentile: Optional[float] = None,
+    max_injury_risk: Optional[float] = None,
+    limit: int = 20,
+    offset: int = 0
+) -> List[dict]:
+    """Filter athletes on indexed attributes and rank them by cohort percentile"""
+    query = db.query(
+        AthleteCohortRank, User.name, User.location, AthleteProfile.injury_risk
+    ).join(
+        User, User.id == AthleteCohortRank.athlete_id
+    ).join(
+        AthleteProfile, AthleteProfile.user_id == AthleteCohortRank.athlete_id
+    ).filter(
+        AthleteCohortRank.test_type == test_type,
+        User.is_active == True
+    )
+
+    if sport:
+        query = query.filter(AthleteCohortRank.sport == sport)
+    if gender:
+        query = query.filter(AthleteCohortRank.gender == gender)
+    if age_group:
+        query = query.filter(AthleteCohortRank.age_group == age_group)
+    if min_age is not None:
+        query = query.filter(AthleteCohortRank.age >= min_age)
+    if max_age is not None:
+        query = query.filter(AthleteCohortRank.age <= max_age)
+    if location:
+        query = query.filter(User.location == location)
+    if min_percentile is not None:
+        query = query.filter(AthleteCohortRank.percentile >= min_percentile)
+    if max_injury_risk is not None:
+        query = query.filter(AthleteProfile.injury_risk <= max_injury_risk)
+
+    rows = query.order_by(
+        AthleteCohortRank.percentile.desc(), AthleteCohortRank.best_score.desc()
+    ).offset(offset).limit(limit).all()
+
+    return [
+        {
+            "athlete_id": rank.athlete_id,
+            "name": name,
+            "sport": rank.sport,
+            "age": rank.age,
+            "age_group": rank.age_group,
+            "gender": rank.gender,
+            "location": athlete_location,
+            "test_type": rank.test_type,
+            "best_score": rank.best_score,
+            "percentile": rank.percentile,
+            "injury_risk": injury_risk
+        }
+        for rank, name, athlete_location, injury_risk in rows
+    ]
+
+# Rebuild cohort ranks if this script is executed directly
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        count = rebuild_cohort_ranks(db)
+        print(f"Ranked {count} athlete/test combinations")
+    finally:
+        db.close()
@@ -1,6 +1,8 @@
 
 import boto3
 import os
+import tempfile
+from contextlib import contextmanager
 from botocore.exceptions import NoCredentialsError
 from fastapi import UploadFile
 import uuid
@@ -39,6 +41,41 @@ class CloudStorage:
         except Exception as e:
             raise Exception(f"Failed to upload file: {str(e)}")
 
+    def _key_from_url(self, file_url: str) -> str:
+        return file_url.split(".s3.amazonaws.com/", 1)[1]
+
+    def download_video(self, file_url: str, destination: str):
+        """Download a stored video to a local path"""
+        self.s3_client.download_file(self.bucket_name, self._key_from_url(file_url), destination)
+
+    def move_to_cold_tier(self, file_url: str, storage_class: str = "GLACIER_IR"):
+        """Rewrite an object in place with a cheaper storage class; its URL is unchanged"""
+        key = self._key_from_url(file_url)
+        self.s3_client.copy_object(
+            Bucket=self.bucket_name,
+            Key=key,
+            CopySource={"Bucket": self.bucket_name, "Key": key},
+            StorageClass=storage_class,
+            MetadataDirective="COPY"
+        )
+
+    def delete_video(self, file_url: str):
+        self.s3_client.delete_object(Bucket=self.bucket_name, Key=self._key_from_url(file_url))
+
+def is_cloud_url(path: str) -> bool:
+    return path.startswith("https://") and ".s3.amazonaws.com/" in path
+
+@contextmanager
+def local_copy(path: str):
+    """Yield a local path for a stored video, downloading S3 objects to a temporary file"""
+    if not is_cloud_url(path):
+        yield path
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        local_path = os.path.join(tmp_dir, os.path.basename(path))
+        CloudStorage().download_video(path, local_path)
+        yield local_path
+
 # Fallback to local storage if cloud storage is not configured
 async def save_upload_file(file: UploadFile, subdirectory: str = "") -> str:
     if all([os.environ.get('AWS_ACCESS_KEY_ID'), 
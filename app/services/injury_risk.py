@@ -0,0 +1,192 @@
+
+import argparse
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import numpy as np
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.athlete import AthleteProfile, PerformanceData
+
+LOOKBACK_DAYS = 90
+LOAD_WINDOW_DAYS = 7
+
+FEATURES = [
+    "form_consistency",  # Mean elbow-angle std; higher means sloppier form
+    "consistency_trend",  # Per-session change in form_consistency; positive means degrading
+    "depth_trend",  # Per-session change in average_depth; negative means losing range
+    "cheat_rate",  # Share of sessions with form violations
+    "load_frequency",  # Sessions in the last week
+    "weekly_repetitions",  # Repetitions in the last week
+]
+
+# Fallback logistic model used until a trained scikit-learn model is supplied
+FEATURE_SCALES = np.array([20.0, 2.0, 2.0, 1.0, 7.0, 200.0])
+FEATURE_WEIGHTS = np.array([1.2, 0.8, -0.8, 1.0, 0.9, 0.6])
+INTERCEPT = -3.0
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def _slope(values: np.ndarray) -> float:
+    """Least-squares slope of a series against its index"""
+    if len(values) < 2:
+        return 0.0
+    x = np.arange(len(values)) - (len(values) - 1) / 2
+    return float(np.dot(x, values - values.mean()) / np.dot(x, x))
+
+def extract_features(db: Session, athlete_ids: List[int], now: datetime) -> np.ndarray:
+    """Build a (len(athlete_ids), len(FEATURES)) matrix from recent performance metrics"""
+    rows = db.query(
+        PerformanceData.athlete_id,
+        PerformanceData.timestamp,
+        PerformanceData.metrics,
+        PerformanceData.cheat_detected
+    ).filter(
+        PerformanceData.athlete_id.in_(athlete_ids),
+        PerformanceData.timestamp >= now - timedelta(days=LOOKBACK_DAYS)
+    ).order_by(PerformanceData.athlete_id, PerformanceData.timestamp).all()
+
+    sessions = defaultdict(list)
+    for athlete_id, timestamp, metrics, cheat_detected in rows:
+        metrics = metrics or {}
+        sessions[athlete_id].append((
+            _utc(timestamp),
+            metrics.get("form_consistency", np.nan),
+            metrics.get("average_depth", np.nan),
+            metrics.get("repetitions") or 0,
+            bool(cheat_detected)
+        ))
+
+    load_start = now - timedelta(days=LOAD_WINDOW_DAYS)
+    matrix = np.zeros((len(athlete_ids), len(FEATURES)))
+    for i, athlete_id in enumerate(athlete_ids):
+        history = sessions.get(athlete_id)
+        if not history:
+            continue
+        timestamps, consistency, depth, reps, cheats = zip(*history)
+        consistency = np.array(consistency, dtype=float)
+        depth = np.array(depth, dtype=float)
+        recent = np.array([t >= load_start for t in timestamps])
+        consistency = consistency[~np.isnan(consistency)]
+        depth = depth[~np.isnan(depth)]
+
+        matrix[i] = [
+            consistency.mean() if len(consistency) else 0.0,
+            _slope(consistency),
+            _slope(depth),
+            np.mean(cheats),
+            recent.sum(),
+            np.array(reps, dtype=float)[recent].sum()
+        ]
+    return matrix
+
+class InjuryRiskModel:
+    """Scores feature matrices in one vectorized call"""
+
+    def __init__(self, model_path: Optional[str] = None):
+        self.estimator = None
+        if model_path:
+            import joblib  # Installed with scikit-learn
+            self.estimator = joblib.load(model_path)
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        if self.estimator is not None:
+            return self.estimator.predict_proba(features)[:, 1]
+        logits = (features / FEATURE_SCALES) @ FEATURE_WEIGHTS + INTERCEPT
+        return 1.0 / (1.0 + np.exp(-logits))
+
+def athletes_to_score(db: Session, full: bool = False, now: Optional[datetime] = None) -> List[int]:
+    """Every athlete profile on full runs; incremental runs only pick those whose features changed.
+
+    Features change when a performance is added or edited, including historical rows from a bulk
+    import, and when an old session ages out of the load or lookback window.
+    """
+    now = now or datetime.now(timezone.utc)
+    load_start = now - timedelta(days=LOAD_WINDOW_DAYS)
+    lookback_start = now - timedelta(days=LOOKBACK_DAYS)
+    rows = db.query(
+        AthleteProfile.user_id,
+        AthleteProfile.injury_risk_updated_at,
+        func.max(PerformanceData.updated_at),
+        func.max(case((PerformanceData.timestamp < load_start, PerformanceData.timestamp))),
+        func.max(case((PerformanceData.timestamp < lookback_start, PerformanceData.timestamp)))
+    ).outerjoin(
+        PerformanceData, PerformanceData.athlete_id == AthleteProfile.user_id
+    ).group_by(
+        AthleteProfile.user_id, AthleteProfile.injury_risk_updated_at
+    ).order_by(AthleteProfile.user_id)
+
+    athlete_ids = []
+    for athlete_id, scored_at, last_change, latest_before_load, latest_before_lookback in rows:
+        if athlete_id is None:
+            continue
+        scored_at, last_change = _utc(scored_at), _utc(last_change)
+        latest_before_load, latest_before_lookback = _utc(latest_before_load), _utc(latest_before_lookback)
+        if full:
+            changed = True
+        elif scored_at is None:
+            changed = last_change is not None
+        else:
+            changed = (
+                (last_change is not None and last_change > scored_at)
+                or (latest_before_load is not None and latest_before_load >= scored_at - timedelta(days=LOAD_WINDOW_DAYS))
+                or (latest_before_lookback is not None and latest_before_lookback >= scored_at - timedelta(days=LOOKBACK_DAYS))
+            )
+        if changed:
+            athlete_ids.append(athlete_id)
+    return athlete_ids
+
+def score_chunk(athlete_ids: List[int], model: InjuryRiskModel, now: datetime) -> int:
+    """Extract, score and bulk-update one chunk of athletes in its own session"""
+    db = SessionLocal()
+    try:
+        scores = model.predict(extract_features(db, athlete_ids, now))
+        profile_ids = dict(db.query(AthleteProfile.user_id, AthleteProfile.id).filter(
+            AthleteProfile.user_id.in_(athlete_ids)
+        ).all())
+        db.bulk_update_mappings(AthleteProfile, [
+            {"id": profile_ids[athlete_id], "injury_risk": float(score), "injury_risk_updated_at": now}
+            for athlete_id, score in zip(athlete_ids, scores)
+            if athlete_id in profile_ids
+        ])
+        db.commit()
+        return len(athlete_ids)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def run_scoring(full: bool = False, chunk_size: int = 1000, workers: int = 4, model_path: Optional[str] = None) -> int:
+    """Score athletes in parallel chunks; returns the number of athletes scored"""
+    model = InjuryRiskModel(model_path or os.environ.get("INJURY_RISK_MODEL_PATH"))
+    now = datetime.now(timezone.utc)
+
+    db = SessionLocal()
+    try:
+        athlete_ids = athletes_to_score(db, full, now)
+    finally:
+        db.close()
+
+    chunks = [athlete_ids[i:i + chunk_size] for i in range(0, len(athlete_ids), chunk_size)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(lambda chunk: score_chunk(chunk, model, now), chunks))
+
+# Run scoring if this script is executed directly
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch-score AthleteProfile.injury_risk")
+    parser.add_argument("--full", action="store_true", help="Rescore every athlete, not just those whose features changed")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--model", help="Path to a joblib-saved scikit-learn classifier")
+    args = parser.parse_args()
+
+    count = run_scoring(args.full, args.chunk_size, args.workers, args.model)
+    print(f"Scored injury risk for {count} athletes")
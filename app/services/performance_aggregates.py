@@ -0,0 +1,155 @@
+
+import argparse
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.performance import PerformanceData, PerformanceAggregate
+
+PERIODS = ("day", "week")
+
+def bucket_start(timestamp: datetime, period: str) -> date:
+    """Start date of the day/week bucket containing a timestamp"""
+    day = (timestamp or datetime.utcnow()).date()
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+def is_plausible(performance: PerformanceData) -> bool:
+    """Submissions that failed plausibility checks earn no XP or ranking credit"""
+    return not (performance.metrics or {}).get("plausibility_flags")
+
+def _apply(aggregate: PerformanceAggregate, performance: PerformanceData):
+    """Fold a single performance into an aggregate row"""
+    aggregate.attempts = (aggregate.attempts or 0) + 1
+    if performance.ai_score is not None:
+        aggregate.scored_attempts = (aggregate.scored_attempts or 0) + 1
+        aggregate.score_sum = (aggregate.score_sum or 0.0) + performance.ai_score
+        if aggregate.best_score is None or performance.ai_score > aggregate.best_score:
+            aggregate.best_score = performance.ai_score
+    aggregate.total_repetitions = (aggregate.total_repetitions or 0) + int((performance.metrics or {}).get("repetitions") or 0)
+    if performance.cheat_detected:
+        aggregate.cheat_count = (aggregate.cheat_count or 0) + 1
+
+def _new_aggregate(performance: PerformanceData, period: str) -> PerformanceAggregate:
+    return PerformanceAggregate(
+        athlete_id=performance.athlete_id,
+        test_type=performance.test_type,
+        period=period,
+        bucket_start=bucket_start(performance.timestamp, period),
+        attempts=0,
+        scored_attempts=0,
+        score_sum=0.0,
+        total_repetitions=0,
+        cheat_count=0
+    )
+
+def record_performance(db: Session, performance: PerformanceData, retries: int = 1):
+    """Incrementally update the day and week buckets for a newly saved performance"""
+    if not is_plausible(performance):
+        return
+    try:
+        for period in PERIODS:
+            aggregate = db.query(PerformanceAggregate).filter(
+                PerformanceAggregate.athlete_id == performance.athlete_id,
+                PerformanceAggregate.test_type == performance.test_type,
+                PerformanceAggregate.period == period,
+                PerformanceAggregate.bucket_start == bucket_start(performance.timestamp, period)
+            ).with_for_update().first()
+
+            if aggregate is None:
+                aggregate = _new_aggregate(performance, period)
+                db.add(aggregate)
+            _apply(aggregate, performance)
+        db.commit()
+    except IntegrityError:
+        # Another request created the same bucket concurrently; retry against the existing row
+        db.rollback()
+        if retries <= 0:
+            raise
+        record_performance(db, performance, retries - 1)
+
+def rebuild_aggregates(db: Session, athlete_ids: Optional[List[int]] = None, batch_size: int = 1000) -> int:
+    """Recompute aggregates from raw performance rows; returns the number of performances scanned"""
+    delete_query = db.query(PerformanceAggregate)
+    performance_query = db.query(PerformanceData).order_by(PerformanceData.id)
+    if athlete_ids:
+        delete_query = delete_query.filter(PerformanceAggregate.athlete_id.in_(athlete_ids))
+        performance_query = performance_query.filter(PerformanceData.athlete_id.in_(athlete_ids))
+    delete_query.delete(synchronize_session=False)
+
+    buckets: Dict[tuple, PerformanceAggregate] = {}
+    scanned = 0
+    for performance in performance_query.yield_per(batch_size):
+        scanned += 1
+        if not is_plausible(performance):
+            continue
+        for period in PERIODS:
+            key = (performance.athlete_id, performance.test_type, period, bucket_start(performance.timestamp, period))
+            if key not in buckets:
+                buckets[key] = _new_aggregate(performance, period)
+            _apply(buckets[key], performance)
+
+    db.bulk_save_objects(list(buckets.values()))
+    db.commit()
+    return scanned
+
+def get_athlete_trends(
+    db: Session,
+    athlete_ids: List[int],
+    test_type: str,
+    period: str = "week",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    rolling_window: int = 4
+) -> Dict[int, List[dict]]:
+    """Per-athlete bucket series with a rolling average score, read only from aggregate rows"""
+    query = db.query(PerformanceAggregate).filter(
+        PerformanceAggregate.athlete_id.in_(athlete_ids),
+        PerformanceAggregate.test_type == test_type,
+        PerformanceAggregate.period == period
+    )
+    if start:
+        query = query.filter(PerformanceAggregate.bucket_start >= start)
+    if end:
+        query = query.filter(PerformanceAggregate.bucket_start <= end)
+
+    trends: Dict[int, List[dict]] = {athlete_id: [] for athlete_id in athlete_ids}
+    windows: Dict[int, List[PerformanceAggregate]] = {athlete_id: [] for athlete_id in athlete_ids}
+    for aggregate in query.order_by(PerformanceAggregate.athlete_id, PerformanceAggregate.bucket_start):
+        window = windows[aggregate.athlete_id]
+        window.append(aggregate)
+        del window[:-rolling_window]
+
+        window_scored = sum(a.scored_attempts for a in window)
+        trends[aggregate.athlete_id].append({
+            "bucket_start": aggregate.bucket_start,
+            "attempts": aggregate.attempts,
+            "best_score": aggregate.best_score,
+            "average_score": aggregate.score_sum / aggregate.scored_attempts if aggregate.scored_attempts else None,
+            "rolling_average_score": sum(a.score_sum for a in window) / window_scored if window_scored else None,
+            "total_repetitions": aggregate.total_repetitions,
+            "cheat_count": aggregate.cheat_count
+        })
+    return trends
+
+# Rebuild aggregates if this script is executed directly
+if __name__ == "__main__":
+    from app.database import SessionLocal
+    from app.services.athlete_search import rebuild_cohort_ranks
+
+    parser = argparse.ArgumentParser(description="Rebuild athlete performance aggregates and cohort ranks")
+    parser.add_argument("--athlete-id", type=int, action="append", dest="athlete_ids",
+                        help="Only rebuild this athlete (repeatable)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        count = rebuild_aggregates(db, args.athlete_ids)
+        print(f"Rebuilt aggregates from {count} performances")
+        # Ranks are derived from the weekly aggregates, so refresh them in the same job
+        count = rebuild_cohort_ranks(db)
+        print(f"Ranked {count} athlete/test combinations")
+    finally:
+        db.close()
@@ -0,0 +1,293 @@
+
+import asyncio
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
+
+from app.models.user import User, UserRole
+
+class BucketLimit(NamedTuple):
+    capacity: float  # Burst size in tokens
+    refill_per_second: float
+
+# Token buckets shared by endpoints that draw on the same resource
+BUCKET_LIMITS = {
+    "analysis": BucketLimit(capacity=30, refill_per_second=30 / 3600),  # ~30 tokens per hour
+    "login": BucketLimit(capacity=10, refill_per_second=10 / 300),  # ~10 attempts per 5 minutes
+}
+
+# Endpoint -> (bucket, token cost); expensive endpoints drain the shared bucket faster
+ENDPOINT_COSTS = {
+    "process_video": ("analysis", 10),
+    "process_landmarks": ("analysis", 1),
+    "processed_video": ("analysis", 3),
+    "login": ("login", 1),
+}
+
+# Bucket capacity and refill are scaled per role
+ROLE_MULTIPLIERS = {
+    UserRole.ATHLETE: 1,
+    UserRole.COACH: 2,
+    UserRole.ADMIN: 10,
+}
+
+MAX_CONCURRENT_ANALYSES_PER_USER = 1
+MAX_CONCURRENT_ANALYSES = int(os.environ.get("MAX_CONCURRENT_ANALYSES", 4))  # Across all workers sharing the store
+MAX_QUEUED_ANALYSES_PER_USER = 2
+ANALYSIS_QUEUE_TIMEOUT = float(os.environ.get("ANALYSIS_QUEUE_TIMEOUT", 60))
+ANALYSIS_QUEUE_POLL_SECONDS = 0.2
+ANALYSIS_LEASE_SECONDS = 900  # Running slots left behind by a crashed worker expire after this
+BUCKET_SWEEP_SECONDS = 60
+
+def _may_start(slots: List[Tuple[int, str, bool]], ticket: int, per_user: int, total: int) -> bool:
+    """Whether a waiting ticket can start: slots are (ticket, key, running) in ticket order.
+
+    Waiters start first come, first served, but a user at their own cap never blocks other users.
+    """
+    running = Counter(key for _, key, is_running in slots if is_running)
+    if sum(running.values()) >= total:
+        return False
+    for waiting_ticket, key, is_running in slots:
+        if is_running or running[key] >= per_user:
+            continue
+        return waiting_ticket == ticket
+    return False
+
+class InMemoryBucketStore:
+    """Process-local token buckets and analysis slots"""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}  # key -> (tokens, updated, full_at)
+        self._slots: Dict[int, List] = {}  # ticket -> [key, running, updated]
+        self._tickets = itertools.count(1)
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+    def take(self, key: str, cost: float, limit: BucketLimit, now: float) -> Tuple[bool, float]:
+        """Try to remove `cost` tokens; returns (allowed, seconds until enough tokens)"""
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (limit.capacity, now, now))
+            tokens = min(limit.capacity, tokens + (now - updated) * limit.refill_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now, now + (limit.capacity - tokens) / limit.refill_per_second)
+            if now - self._last_sweep >= BUCKET_SWEEP_SECONDS:
+                self._sweep(now)
+        return allowed, 0.0 if allowed else (cost - tokens) / limit.refill_per_second
+
+    def _sweep(self, now: float):
+        """Drop buckets that have refilled completely; a missing bucket starts full anyway"""
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        self._last_sweep = now
+
+    def enqueue(self, key: str, max_queued: int, now: float) -> Optional[int]:
+        """Join the analysis queue; returns a ticket, or None if the user already has too many waiting"""
+        with self._lock:
+            if sum(1 for slot_key, running, _ in self._slots.values() if slot_key == key and not running) >= max_queued:
+                return None
+            ticket = next(self._tickets)
+            self._slots[ticket] = [key, False, now]
+            return ticket
+
+    def try_start(self, ticket: int, per_user: int, total: int, now: float) -> bool:
+        with self._lock:
+            slots = [(t, key, running) for t, (key, running, _) in sorted(self._slots.items())]
+            if not _may_start(slots, ticket, per_user, total):
+                return False
+            self._slots[ticket][1:] = [True, now]
+            return True
+
+    def release(self, ticket: int):
+        with self._lock:
+            self._slots.pop(ticket, None)
+
+    def in_flight(self) -> Tuple[int, int]:
+        """(running, waiting) analysis slots"""
+        with self._lock:
+            running = sum(1 for _, is_running, _ in self._slots.values() if is_running)
+            return running, len(self._slots) - running
+
+class SQLiteBucketStore:
+    """Token buckets and analysis slots in a SQLite file, shared by every worker process on the host.
+
+    Local stand-in for a shared store such as Redis.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS token_buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_slots "
+                "(ticket INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT, running INTEGER, updated REAL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, work):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def take(self, key: str, cost: float, limit: BucketLimit, now: float) -> Tuple[bool, float]:
+        def work(conn):
+            row = conn.execute("SELECT tokens, updated FROM token_buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (limit.capacity, now)
+            tokens = min(limit.capacity, tokens + (now - updated) * limit.refill_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute(
+                "INSERT OR REPLACE INTO token_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now)
+            )
+            return allowed, tokens
+        allowed, tokens = self._transaction(work)
+        return allowed, 0.0 if allowed else (cost - tokens) / limit.refill_per_second
+
+    def _expire_slots(self, conn, now: float):
+        # Waiters refresh their row on every poll; anything older belongs to a dead worker
+        conn.execute(
+            "DELETE FROM analysis_slots WHERE (running = 0 AND updated < ?) OR (running = 1 AND updated < ?)",
+            (now - ANALYSIS_QUEUE_TIMEOUT, now - ANALYSIS_LEASE_SECONDS)
+        )
+
+    def enqueue(self, key: str, max_queued: int, now: float) -> Optional[int]:
+        def work(conn):
+            self._expire_slots(conn, now)
+            (waiting,) = conn.execute(
+                "SELECT COUNT(*) FROM analysis_slots WHERE key = ? AND running = 0", (key,)
+            ).fetchone()
+            if waiting >= max_queued:
+                return None
+            return conn.execute(
+                "INSERT INTO analysis_slots (key, running, updated) VALUES (?, 0, ?)", (key, now)
+            ).lastrowid
+        return self._transaction(work)
+
+    def try_start(self, ticket: int, per_user: int, total: int, now: float) -> bool:
+        def work(conn):
+            self._expire_slots(conn, now)
+            conn.execute("UPDATE analysis_slots SET updated = ? WHERE ticket = ?", (now, ticket))
+            slots = [
+                (t, key, bool(running))
+                for t, key, running in conn.execute("SELECT ticket, key, running FROM analysis_slots ORDER BY ticket")
+            ]
+            if not _may_start(slots, ticket, per_user, total):
+                return False
+            conn.execute("UPDATE analysis_slots SET running = 1 WHERE ticket = ?", (ticket,))
+            return True
+        return self._transaction(work)
+
+    def release(self, ticket: int):
+        self._transaction(lambda conn: conn.execute("DELETE FROM analysis_slots WHERE ticket = ?", (ticket,)))
+
+    def in_flight(self) -> Tuple[int, int]:
+        running, waiting = self._connect().execute(
+            "SELECT COALESCE(SUM(running), 0), COUNT(*) - COALESCE(SUM(running), 0) FROM analysis_slots"
+        ).fetchone()
+        return running, waiting
+
+class RateLimiter:
+    def __init__(self, store=None):
+        self.store = store or InMemoryBucketStore()
+        self.throttled = Counter()  # (endpoint, reason) -> count
+
+    def check(self, endpoint: str, identity: str, role: Optional[UserRole] = None):
+        """Charge an endpoint's cost to the caller's bucket, raising 429 when exhausted"""
+        bucket, cost = ENDPOINT_COSTS[endpoint]
+        multiplier = ROLE_MULTIPLIERS.get(role, 1)
+        base = BUCKET_LIMITS[bucket]
+        limit = BucketLimit(base.capacity * multiplier, base.refill_per_second * multiplier)
+
+        allowed, retry_after = self.store.take(f"{bucket}:{identity}", cost, limit, time.time())
+        if not allowed:
+            self.throttled[(endpoint, "rate")] += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(int(retry_after) + 1)}
+            )
+
+    def _concurrency_error(self, endpoint: str, detail: str) -> HTTPException:
+        self.throttled[(endpoint, "concurrency")] += 1
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(int(ANALYSIS_QUEUE_TIMEOUT))}
+        )
+
+    @asynccontextmanager
+    async def analysis_slot(self, endpoint: str, user: User, timeout: float = ANALYSIS_QUEUE_TIMEOUT):
+        """Wait in a first-come queue for an analysis slot, then charge the endpoint's tokens.
+
+        Each athlete runs one analysis at a time and the store caps analyses across all workers.
+        Tokens are only charged once the analysis is about to start. Store calls may block on a
+        shared SQLite file, so they run in the threadpool rather than on the event loop.
+        """
+        ticket = await run_in_threadpool(self.store.enqueue, f"user:{user.id}", MAX_QUEUED_ANALYSES_PER_USER, time.time())
+        if ticket is None:
+            raise self._concurrency_error(endpoint, "Too many analyses queued for this account")
+        try:
+            deadline = time.monotonic() + timeout
+            while not await run_in_threadpool(
+                self.store.try_start, ticket, MAX_CONCURRENT_ANALYSES_PER_USER, MAX_CONCURRENT_ANALYSES, time.time()
+            ):
+                if time.monotonic() >= deadline:
+                    raise self._concurrency_error(endpoint, "Analysis workers are busy, please try again later")
+                await asyncio.sleep(ANALYSIS_QUEUE_POLL_SECONDS)
+            await run_in_threadpool(self.check, endpoint, f"user:{user.id}", user.role)
+            yield
+        finally:
+            await run_in_threadpool(self.store.release, ticket)
+
+    def stats(self) -> dict:
+        running, waiting = self.store.in_flight()
+        return {
+            "throttled": [
+                {"endpoint": endpoint, "reason": reason, "count": count}
+                for (endpoint, reason), count in sorted(self.throttled.items())
+            ],
+            "analyses_in_flight": running,
+            "analyses_queued": waiting
+        }
+
+def _create_store():
+    if os.environ.get("RATE_LIMIT_STORE", "memory") == "sqlite":
+        return SQLiteBucketStore(os.environ.get("RATE_LIMIT_DB", "rate_limits.db"))
+    return InMemoryBucketStore()
+
+rate_limiter = RateLimiter(_create_store())
+
+def login_rate_limit(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
+    """Throttle login attempts per client address and per account from that address.
+
+    The account bucket is scoped to the client so nobody can lock an account out from elsewhere.
+    """
+    client = request.client.host if request.client else "unknown"
+    rate_limiter.check("login", f"ip:{client}")
+    rate_limiter.check("login", f"ip:{client}:email:{form_data.username.lower()}")
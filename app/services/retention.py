@@ -0,0 +1,182 @@
+
+import argparse
+import os
+import shutil
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.models.performance import PerformanceData, StoredArtifact
+from app.services.cloud_storage import CloudStorage, is_cloud_url, local_copy
+from app.utils.mediapipe_utils import detected_frame_mask, load_landmark_array, save_landmark_array
+
+RETENTION_DAYS = int(os.environ.get("VIDEO_RETENTION_DAYS", 30))
+COLD_STORAGE_DIR = Path(os.environ.get("COLD_STORAGE_DIR", "cold_storage/videos"))
+PREVIEW_DIR = Path("uploads") / "previews"
+# Delete originals instead of moving them to the cold tier
+EXPIRE_ORIGINALS = os.environ.get("VIDEO_RETENTION_EXPIRE", "false").lower() == "true"
+
+def _file_size(location: Optional[str]) -> Optional[int]:
+    if location and not is_cloud_url(location) and os.path.exists(location):
+        return os.path.getsize(location)
+    return None
+
+def _artifact(db: Session, performance_id: int, kind: str) -> Optional[StoredArtifact]:
+    return db.query(StoredArtifact).filter(
+        StoredArtifact.performance_id == performance_id,
+        StoredArtifact.kind == kind
+    ).first()
+
+def record_artifact(db: Session, performance_id: int, kind: str, tier: str, location: Optional[str]):
+    artifact = _artifact(db, performance_id, kind)
+    if artifact is None:
+        artifact = StoredArtifact(performance_id=performance_id, kind=kind)
+        db.add(artifact)
+    artifact.tier = tier
+    artifact.location = location
+    artifact.size_bytes = _file_size(location)
+
+def resolve_artifact(db: Session, performance: PerformanceData, kind: str = "raw_video") -> Optional[str]:
+    """Current location of a performance artifact, or None if it no longer exists"""
+    artifact = _artifact(db, performance.id, kind)
+    if artifact is None:
+        # Not compacted yet: artifacts are still where the upload put them
+        return {"raw_video": performance.raw_video_path, "landmarks": performance.landmarks_path}.get(kind)
+    if artifact.tier == "pending":
+        # Move or expiry in progress; the original is authoritative until it has left
+        raw_path = performance.raw_video_path
+        if is_cloud_url(raw_path) or os.path.exists(raw_path):
+            return raw_path
+    return artifact.location
+
+def _ensure_landmarks(performance: PerformanceData, ai_processor, video_path: str) -> np.ndarray:
+    """Load the performance's landmarks, extracting them from the video if they were never stored"""
+    if performance.landmarks_path and os.path.exists(performance.landmarks_path):
+        return load_landmark_array(performance.landmarks_path)
+
+    landmark_array = ai_processor.process_video(video_path, performance.test_type).get("landmark_array")
+    if landmark_array is None or not detected_frame_mask(landmark_array).any():
+        raise ValueError("no pose landmarks could be extracted; keeping the original video")
+    performance.landmarks_path = save_landmark_array(landmark_array)
+    return landmark_array
+
+def _finish_raw_video(db: Session, performance: PerformanceData, storage: Optional[CloudStorage]):
+    """Carry out a committed move or expiry of the original; safe to repeat after a crash"""
+    raw_path = performance.raw_video_path
+    target = _artifact(db, performance.id, "raw_video").location
+    if target is None:
+        if is_cloud_url(raw_path):
+            storage.delete_video(raw_path)
+        elif os.path.exists(raw_path):
+            os.remove(raw_path)
+        tier = "expired"
+    elif is_cloud_url(raw_path):
+        storage.move_to_cold_tier(raw_path)  # In-place storage class change
+        tier = "cold"
+    else:
+        if os.path.exists(raw_path):
+            COLD_STORAGE_DIR.mkdir(parents=True, exist_ok=True)
+            shutil.move(raw_path, target)
+        elif not os.path.exists(target):
+            raise FileNotFoundError(f"Original video {raw_path} is missing")
+        tier = "cold"
+    record_artifact(db, performance.id, "raw_video", tier, target)
+    db.commit()
+
+def compact_performance(db: Session, performance: PerformanceData, ai_processor, storage: Optional[CloudStorage] = None):
+    """Keep landmarks plus a low-bitrate preview, then move or expire the original video"""
+    raw_path = performance.raw_video_path
+    cloud = is_cloud_url(raw_path)
+    if cloud and storage is None:
+        storage = CloudStorage()
+
+    if _artifact(db, performance.id, "raw_video") is None:
+        PREVIEW_DIR.mkdir(parents=True, exist_ok=True)
+        preview_path = str(PREVIEW_DIR / f"{performance.id}.mp4")
+        with local_copy(raw_path) as source:
+            landmark_array = _ensure_landmarks(performance, ai_processor, source)
+            ai_processor.render_overlay(source, landmark_array, preview_path, "preview")
+        record_artifact(db, performance.id, "landmarks", "hot", performance.landmarks_path)
+        record_artifact(db, performance.id, "preview", "hot", preview_path)
+
+        if EXPIRE_ORIGINALS:
+            target = None
+        elif cloud:
+            target = raw_path
+        else:
+            target = str(COLD_STORAGE_DIR / f"{performance.id}_{os.path.basename(raw_path)}")
+        # Commit the destination before touching the original so an interrupted run can resume
+        record_artifact(db, performance.id, "raw_video", "pending", target)
+        db.commit()
+
+    _finish_raw_video(db, performance, storage)
+
+def run_retention_pass(
+    db: Session,
+    ai_processor,
+    retention_days: int = RETENTION_DAYS,
+    batch_size: int = 20,
+    throttle_seconds: float = 1.0,
+    max_batches: Optional[int] = None
+) -> int:
+    """Compact performances older than the retention window in throttled batches"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    failed_ids = set()
+    compacted = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        query = db.query(PerformanceData).outerjoin(
+            StoredArtifact,
+            (StoredArtifact.performance_id == PerformanceData.id) & (StoredArtifact.kind == "raw_video")
+        ).filter(
+            or_(StoredArtifact.id.is_(None), StoredArtifact.tier == "pending"),
+            PerformanceData.raw_video_path.isnot(None),
+            PerformanceData.timestamp < cutoff
+        )
+        if failed_ids:
+            query = query.filter(PerformanceData.id.notin_(failed_ids))
+        batch = query.order_by(PerformanceData.id).limit(batch_size).all()
+        if not batch:
+            break
+
+        for performance in batch:
+            try:
+                compact_performance(db, performance, ai_processor)
+                compacted += 1
+            except Exception as e:
+                print(f"Error compacting performance {performance.id}: {e}")
+                db.rollback()
+                failed_ids.add(performance.id)
+            time.sleep(throttle_seconds)  # Leave CPU and I/O for request handling
+        batches += 1
+
+    return compacted
+
+# Run retention passes if this script is executed directly
+if __name__ == "__main__":
+    from app.database import SessionLocal
+    from app.services.ai_processor import AIProcessor
+
+    parser = argparse.ArgumentParser(description="Compact old raw videos to landmarks and previews")
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--throttle", type=float, default=1.0, help="Seconds to sleep between performances")
+    parser.add_argument("--interval", type=int, default=0, help="Repeat every N seconds (0 runs once)")
+    args = parser.parse_args()
+
+    ai_processor = AIProcessor()
+    while True:
+        db = SessionLocal()
+        try:
+            count = run_retention_pass(db, ai_processor, args.days, args.batch_size, args.throttle)
+            print(f"Compacted {count} performances")
+        finally:
+            db.close()
+        if not args.interval:
+            break
+        time.sleep(args.interval)
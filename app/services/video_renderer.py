@@ -0,0 +1,96 @@
+
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.services.cloud_storage import local_copy
+from app.utils.mediapipe_utils import load_landmark_array
+
+RENDER_CACHE_DIR = Path(os.environ.get("RENDER_CACHE_DIR", "uploads/rendered"))
+RENDER_CACHE_MAX_BYTES = int(os.environ.get("RENDER_CACHE_MAX_MB", 500)) * 1024 * 1024
+# Temp files older than this were left behind by a worker that died mid-render
+STALE_RENDER_SECONDS = 3600
+
+class RenderCache:
+    """Size-bounded on-disk cache of rendered overlay videos, evicting least recently used files"""
+
+    def __init__(self, cache_dir: Path = RENDER_CACHE_DIR, max_bytes: int = RENDER_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._locks = {}  # name -> [lock, number of requests holding or waiting on it]
+        self._locks_guard = threading.Lock()
+        self._eviction_lock = threading.Lock()
+
+    def path_for(self, performance_id: int, preset: str) -> Path:
+        return self.cache_dir / f"{performance_id}_{preset}.mp4"
+
+    @contextmanager
+    def _render_lock(self, name: str):
+        """Per-render lock, dropped once no request is using it so the table does not grow"""
+        with self._locks_guard:
+            entry = self._locks.setdefault(name, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[name]
+
+    def get_or_render(self, performance, preset: str, ai_processor, video_path: str, landmarks_path: str) -> str:
+        """Return a cached render, producing it first if needed; concurrent requests render once"""
+        output_path = self.path_for(performance.id, preset)
+        with self._render_lock(output_path.name):
+            if output_path.exists():
+                os.utime(output_path)  # Mark as recently used
+                return str(output_path)
+
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Unique per render: gunicorn workers share the directory but not the lock
+            fd, tmp_name = tempfile.mkstemp(
+                prefix=f"{output_path.stem}.", suffix=".tmp.mp4", dir=self.cache_dir
+            )
+            os.close(fd)
+            tmp_path = Path(tmp_name)
+            try:
+                landmark_array = load_landmark_array(landmarks_path)
+                with local_copy(video_path) as source:
+                    ai_processor.render_overlay(source, landmark_array, str(tmp_path), preset)
+                os.replace(tmp_path, output_path)
+            finally:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+
+        self.evict(keep=output_path)
+        return str(output_path)
+
+    def evict(self, keep: Path = None):
+        """Delete least recently used renders until the cache fits its size budget"""
+        with self._eviction_lock:
+            entries = []
+            for path in self.cache_dir.glob("*.mp4"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                if path.name.endswith(".tmp.mp4"):
+                    if stat.st_mtime < time.time() - STALE_RENDER_SECONDS:
+                        path.unlink(missing_ok=True)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                path.unlink(missing_ok=True)
+                total -= size
+
+render_cache = RenderCache()
@@ -0,0 +1,30 @@
+
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Keep app.main from creating ./test.db when the API tests import it
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.database import Base
+import app.models.user, app.models.athlete, app.models.coach, app.models.gamification, app.models.performance
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
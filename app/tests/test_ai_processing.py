@@ -0,0 +1,392 @@
+
+import numpy as np
+import pytest
+
+from app.services.ai_processor import AIProcessor
+from app.utils.mediapipe_utils import decode_landmark_array, NUM_POSE_LANDMARKS
+
+@pytest.fixture(scope="module")
+def ai_processor():
+    return AIProcessor()
+
+def make_pushup_landmarks(frames=300, fps=30, seed=0):
+    """Synthetic frames x 33 x 4 pushup capture with realistic jitter"""
+    rng = np.random.default_rng(seed)
+    array = np.zeros((frames, NUM_POSE_LANDMARKS, 4), dtype=np.float32)
+    array[:, :, 0] = 0.5
+    array[:, :, 1] = 0.5
+    array[:, :, 3] = 0.9
+
+    # Elbow angle oscillates between 170 and 70 degrees, two seconds per rep
+    t = np.arange(frames) / fps
+    angle = np.radians(120 + 50 * np.cos(2 * np.pi * t / 2))
+    for shoulder, elbow, wrist, x in [(11, 13, 15, 0.45), (12, 14, 16, 0.55)]:
+        array[:, shoulder, :2] = [x, 0.40]
+        array[:, elbow, :2] = [x, 0.52]
+        array[:, wrist, 0] = x + 0.12 * np.sin(angle)
+        array[:, wrist, 1] = 0.52 - 0.12 * np.cos(angle)
+    array[:, 23, :2] = [0.45, 0.42]
+    array[:, 24, :2] = [0.55, 0.42]
+
+    array[:, :, :2] += rng.normal(0, 0.002, size=(frames, NUM_POSE_LANDMARKS, 2))
+    return array
+
+def test_decode_landmark_array_roundtrip():
+    array = make_pushup_landmarks(frames=10)
+    decoded = decode_landmark_array(array.astype("<f4").tobytes(), frames=10)
+    np.testing.assert_array_equal(decoded, array)
+
+def test_decode_landmark_array_rejects_wrong_size():
+    with pytest.raises(ValueError):
+        decode_landmark_array(b"\x00" * 16, frames=10)
+
+def test_decode_landmark_array_rejects_partial_nan():
+    array = make_pushup_landmarks(frames=10)
+    array[3, 15, 0] = np.nan
+    with pytest.raises(ValueError):
+        decode_landmark_array(array.tobytes(), frames=10)
+
+def test_decode_landmark_array_allows_undetected_frames():
+    array = make_pushup_landmarks(frames=10)
+    array[3] = np.nan
+    decoded = decode_landmark_array(array.tobytes(), frames=10)
+    assert np.isnan(decoded[3]).all()
+
+def test_clean_submission_is_plausible(ai_processor):
+    results = ai_processor.process_landmarks(make_pushup_landmarks(), "pushups", fps=30)
+    assert results["metrics"]["plausibility_flags"] == []
+    assert results["cheat_detected"] is False
+    assert results["metrics"]["repetitions"] > 0
+    assert 0 < results["ai_score"] < 100
+
+def test_undetected_frames_are_skipped(ai_processor):
+    array = make_pushup_landmarks()
+    array[100:110] = np.nan
+    results = ai_processor.process_landmarks(array, "pushups", fps=30)
+    assert results["metrics"]["plausibility_flags"] == []
+    assert results["frames_processed"] == 300
+    assert len(results["landmarks"]) == 290
+
+def test_occluded_joint_noise_is_not_a_teleport(ai_processor):
+    array = make_pushup_landmarks()
+    rng = np.random.default_rng(1)
+    array[:, 27, :2] = rng.uniform(0, 1, size=(len(array), 2))  # Off-screen ankle
+    array[:, 27, 3] = 0.05
+    results = ai_processor.process_landmarks(array, "pushups", fps=30)
+    assert "joint_teleport" not in results["metrics"]["plausibility_flags"]
+
+def test_visible_joint_jump_is_a_teleport(ai_processor):
+    array = make_pushup_landmarks()
+    array[150:, 0, 0] += 0.4  # Nose jumps across the frame
+    results = ai_processor.process_landmarks(array, "pushups", fps=30)
+    assert "joint_teleport" in results["metrics"]["plausibility_flags"]
+    assert results["cheat_detected"] is True
+
+def test_teleport_threshold_scales_with_fps(ai_processor):
+    array = make_pushup_landmarks()
+    array[150:, 0, 0] += 0.2
+    slow = ai_processor.process_landmarks(array, "pushups", fps=10)
+    fast = ai_processor.process_landmarks(array, "pushups", fps=60)
+    assert "joint_teleport" not in slow["metrics"]["plausibility_flags"]
+    assert "joint_teleport" in fast["metrics"]["plausibility_flags"]
+
+def test_gap_between_detections_is_not_a_teleport(ai_processor):
+    array = make_pushup_landmarks()
+    array[100:130] = np.nan
+    array[130:, 0, 0] += 0.2  # Athlete moved while out of frame
+    results = ai_processor.process_landmarks(array, "pushups", fps=30)
+    assert "joint_teleport" not in results["metrics"]["plausibility_flags"]
+
+def test_fabricated_rep_cadence_is_flagged(ai_processor):
+    array = make_pushup_landmarks()
+    # Elbow snaps between 175 and 60 degrees every two frames
+    angle = np.radians(np.where(np.arange(len(array)) // 2 % 2 == 0, 175, 60))
+    for elbow, wrist, x in [(13, 15, 0.45), (14, 16, 0.55)]:
+        array[:, wrist, 0] = x + 0.12 * np.sin(angle)
+        array[:, wrist, 1] = 0.52 - 0.12 * np.cos(angle)
+    array[:, :, :2] += np.random.default_rng(2).normal(0, 0.002, size=array[:, :, :2].shape)
+    results = ai_processor.process_landmarks(array, "pushups", fps=30)
+    assert "implausible_rep_cadence" in results["metrics"]["plausibility_flags"]
+    assert results["cheat_detected"] is True
+
+def test_low_visibility_cannot_switch_off_checks(ai_processor):
+    array = make_pushup_landmarks()
+    array[150:, 15, 0] += 0.4  # Wrist teleport that visibility 0.4 would hide from the motion checks
+    array[:, :, 3] = 0.4
+    results = ai_processor.process_landmarks(array, "pushups", fps=30)
+    assert "scored_joints_occluded" in results["metrics"]["plausibility_flags"]
+    assert results["cheat_detected"] is True
+
+def test_noise_free_motion_is_flagged_synthetic(ai_processor):
+    array = make_pushup_landmarks()
+    array[:, :, :2] = 0.5  # Frozen skeleton with no estimator noise
+    results = ai_processor.process_landmarks(array, "pushups", fps=30)
+    assert "synthetic_motion" in results["metrics"]["plausibility_flags"]
+
+def test_implausible_frame_rate_is_flagged(ai_processor):
+    results = ai_processor.process_landmarks(make_pushup_landmarks(), "pushups", fps=500)
+    assert "implausible_frame_rate" in results["metrics"]["plausibility_flags"]
+
+def test_aggregate_failure_does_not_fail_saved_performance(db, monkeypatch):
+    from app.models.athlete import AthleteProfile, PerformanceData
+    from app.models.user import User, UserRole
+    from app.routers import ai_processing
+
+    user = User(email="a@example.com", password_hash="x", name="A", role=UserRole.ATHLETE)
+    db.add(user)
+    db.commit()
+    db.add(AthleteProfile(user_id=user.id, xp_points=0))
+    db.commit()
+
+    def broken_aggregates(db, performance):
+        raise RuntimeError("aggregate table locked")
+    monkeypatch.setattr(ai_processing, "record_performance", broken_aggregates)
+
+    results = {"ai_score": 55.0, "metrics": {"repetitions": 5, "plausibility_flags": []}, "feedback": []}
+    response = ai_processing._save_performance(db, user, "pushups", results, raw_video_path="uploads/videos/a.mp4")
+
+    assert response["success"] is True
+    assert response["xp_earned"] == 5
+    assert db.query(PerformanceData).count() == 1
+
+def test_implausible_submission_earns_no_xp_or_aggregates(db, monkeypatch):
+    from app.models.athlete import AthleteProfile
+    from app.models.user import User, UserRole
+    from app.routers import ai_processing
+
+    user = User(email="b@example.com", password_hash="x", name="B", role=UserRole.ATHLETE)
+    db.add(user)
+    db.commit()
+    db.add(AthleteProfile(user_id=user.id, xp_points=0))
+    db.commit()
+
+    recorded = []
+    monkeypatch.setattr(ai_processing, "record_performance", lambda db, performance: recorded.append(performance))
+
+    results = {"ai_score": 100.0, "metrics": {"plausibility_flags": ["joint_teleport"]}, "cheat_detected": True}
+    response = ai_processing._save_performance(db, user, "pushups", results, raw_video_path=None)
+
+    assert response["xp_earned"] == 0
+    assert recorded == []
+    assert user.athlete_profile.xp_points == 0
+
+def test_render_cache_downloads_cloud_videos(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+    from app.services import cloud_storage
+    from app.services.video_renderer import RenderCache
+
+    landmarks_path = tmp_path / "landmarks.npz"
+    np.savez_compressed(landmarks_path, landmarks=make_pushup_landmarks(frames=5).astype(np.float16))
+
+    class FakeStorage:
+        def download_video(self, url, local_path):
+            with open(local_path, "wb") as f:
+                f.write(b"video")
+    monkeypatch.setattr(cloud_storage, "CloudStorage", FakeStorage)
+
+    rendered_from = []
+    class FakeProcessor:
+        def render_overlay(self, video_path, landmark_array, output_path, preset):
+            rendered_from.append(video_path)
+            assert open(video_path, "rb").read() == b"video"
+            with open(output_path, "wb") as f:
+                f.write(b"render")
+
+    cache = RenderCache(cache_dir=tmp_path / "rendered", max_bytes=1024)
+    url = "https://bucket.s3.amazonaws.com/a.mp4"
+    path = cache.get_or_render(SimpleNamespace(id=7), "low", FakeProcessor(), url, str(landmarks_path))
+
+    assert open(path, "rb").read() == b"render"
+    assert rendered_from[0] != url
+
+def test_render_workers_use_separate_temp_files(tmp_path):
+    import os
+    import threading
+    from types import SimpleNamespace
+    from app.services.video_renderer import RenderCache
+
+    landmarks_path = tmp_path / "landmarks.npz"
+    np.savez_compressed(landmarks_path, landmarks=make_pushup_landmarks(frames=5).astype(np.float16))
+    stale = tmp_path / "rendered" / "3_low.abc.tmp.mp4"
+    stale.parent.mkdir()
+    stale.write_bytes(b"partial")
+    os.utime(stale, (0, 0))
+
+    both_rendering = threading.Barrier(2)
+    written_to = []
+    class FakeProcessor:
+        def render_overlay(self, video_path, landmark_array, output_path, preset):
+            written_to.append(output_path)
+            both_rendering.wait(timeout=5)  # Neither worker finishes before the other starts
+            with open(output_path, "wb") as f:
+                f.write(b"render")
+
+    # Two gunicorn workers each have their own cache object and locks over one directory
+    workers = [RenderCache(cache_dir=tmp_path / "rendered", max_bytes=1024) for _ in range(2)]
+    threads = [
+        threading.Thread(target=cache.get_or_render, args=(
+            SimpleNamespace(id=3), "low", FakeProcessor(), "a.mp4", str(landmarks_path)
+        ))
+        for cache in workers
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(written_to)) == 2
+    assert all(path.endswith(".tmp.mp4") for path in written_to)
+    assert sorted(p.name for p in (tmp_path / "rendered").iterdir()) == ["3_low.mp4"]
+    assert (tmp_path / "rendered" / "3_low.mp4").read_bytes() == b"render"
+    assert all(cache._locks == {} for cache in workers)
+
+def test_performance_body_is_cached_per_revision(db):
+    import gzip
+    import json
+    from datetime import datetime, timedelta, timezone
+    from types import SimpleNamespace
+    from app.models.athlete import PerformanceData
+    from app.models.user import User, UserRole
+    from app.routers import ai_processing
+
+    user = User(email="c@example.com", password_hash="x", name="C", role=UserRole.ATHLETE)
+    db.add(user)
+    db.commit()
+    performance = PerformanceData(
+        athlete_id=user.id, test_type="pushups", ai_score=70.0,
+        metrics={"elbow_angles": list(range(500))}, feedback=["Go lower"]
+    )
+    db.add(performance)
+    db.commit()
+    request = SimpleNamespace(headers={"accept-encoding": "gzip, deflate"})
+
+    response = ai_processing.get_performance(performance.id, request, user, db)
+    assert response.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.body))["ai_score"] == 70.0
+
+    # A bulk import in another process rescored the record and bumped updated_at
+    performance.ai_score = 80.0
+    performance.updated_at = datetime.now(timezone.utc) + timedelta(seconds=1)
+    db.commit()
+    plain = ai_processing.get_performance(performance.id, SimpleNamespace(headers={}), user, db)
+    assert "content-encoding" not in plain.headers
+    assert json.loads(plain.body)["ai_score"] == 80.0
+
+def test_api_gzips_large_bodies_exactly_once(db, session_factory):
+    import json
+    from fastapi.testclient import TestClient
+    from app.database import get_db
+    from app.main import app
+    from app.models.athlete import PerformanceData
+    from app.models.user import User, UserRole
+    from app.services.auth import get_current_active_user
+
+    user = User(email="d@example.com", password_hash="x", name="D", role=UserRole.ATHLETE)
+    db.add(user)
+    db.commit()
+    performance = PerformanceData(
+        athlete_id=user.id, test_type="pushups", ai_score=65.0,
+        metrics={"elbow_angles": list(range(500))}, feedback=["Go lower"]
+    )
+    db.add(performance)
+    db.commit()
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    try:
+        client = TestClient(app)
+        for _ in range(2):  # Cache miss, then the pre-gzipped cached body
+            response = client.get(f"/ai/performances/{performance.id}", headers={"Accept-Encoding": "gzip"})
+            assert response.status_code == 200
+            assert response.headers["content-encoding"] == "gzip"
+            # The client undoes one layer of gzip; a second layer would not parse as JSON
+            assert json.loads(response.content)["ai_score"] == 65.0
+
+        plain = client.get(f"/ai/performances/{performance.id}", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.json()["metrics"]["elbow_angles"][-1] == 499
+    finally:
+        app.dependency_overrides.clear()
+
+@pytest.fixture
+def retention_dirs(tmp_path, monkeypatch):
+    from app.services import retention
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(retention, "COLD_STORAGE_DIR", tmp_path / "cold")
+    monkeypatch.setattr(retention, "PREVIEW_DIR", tmp_path / "previews")
+    monkeypatch.setattr(retention, "EXPIRE_ORIGINALS", False)
+    return tmp_path
+
+class FakeVideoProcessor:
+    def __init__(self, landmark_array):
+        self.landmark_array = landmark_array
+
+    def process_video(self, video_path, test_type):
+        return {"landmark_array": self.landmark_array}
+
+    def render_overlay(self, video_path, landmark_array, output_path, preset):
+        with open(output_path, "wb") as f:
+            f.write(b"preview")
+
+def make_old_performance(db, video_path):
+    from datetime import datetime, timezone
+    from app.models.athlete import PerformanceData
+    video_path.write_bytes(b"original")
+    performance = PerformanceData(
+        athlete_id=1, test_type="pushups", raw_video_path=str(video_path),
+        timestamp=datetime(2020, 1, 1, tzinfo=timezone.utc)
+    )
+    db.add(performance)
+    db.commit()
+    return performance
+
+def test_retention_extracts_missing_landmarks_before_moving(db, retention_dirs):
+    from app.services.retention import run_retention_pass, resolve_artifact
+    from app.utils.mediapipe_utils import load_landmark_array
+    performance = make_old_performance(db, retention_dirs / "a.mp4")
+
+    processor = FakeVideoProcessor(make_pushup_landmarks(frames=10))
+    assert run_retention_pass(db, processor, throttle_seconds=0) == 1
+
+    assert not (retention_dirs / "a.mp4").exists()
+    assert open(resolve_artifact(db, performance), "rb").read() == b"original"
+    assert load_landmark_array(resolve_artifact(db, performance, "landmarks")).shape == (10, NUM_POSE_LANDMARKS, 4)
+
+def test_retention_keeps_original_without_landmarks(db, retention_dirs):
+    from app.models.performance import StoredArtifact
+    from app.services.retention import run_retention_pass
+    make_old_performance(db, retention_dirs / "a.mp4")
+
+    undetected = np.full((10, NUM_POSE_LANDMARKS, 4), np.nan, dtype=np.float32)
+    assert run_retention_pass(db, FakeVideoProcessor(undetected), throttle_seconds=0) == 0
+
+    assert (retention_dirs / "a.mp4").exists()
+    assert db.query(StoredArtifact).count() == 0
+
+def test_interrupted_move_is_resumed(db, retention_dirs, monkeypatch):
+    from app.services import retention
+    performance = make_old_performance(db, retention_dirs / "a.mp4")
+    processor = FakeVideoProcessor(make_pushup_landmarks(frames=10))
+
+    real_move = retention.shutil.move
+    crashed = []
+    def move_once_crashing(src, dst):
+        if not crashed:
+            crashed.append(dst)
+            raise OSError("disk unplugged")
+        return real_move(src, dst)
+    monkeypatch.setattr(retention.shutil, "move", move_once_crashing)
+
+    assert retention.run_retention_pass(db, processor, throttle_seconds=0) == 0
+    assert retention.resolve_artifact(db, performance) == str(retention_dirs / "a.mp4")
+
+    # The next pass picks up the pending move instead of starting over
+    assert retention.run_retention_pass(db, processor, throttle_seconds=0) == 1
+    assert retention.resolve_artifact(db, performance) == crashed[0]
+    assert not (retention_dirs / "a.mp4").exists()
@@ -0,0 +1,306 @@
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.models.athlete import AthleteCohortRank, AthleteProfile, PerformanceData
+from app.models.performance import PerformanceAggregate
+from app.models.user import User, UserRole, Gender
+from app.services import athlete_search, injury_risk, performance_aggregates
+from app.utils import bulk_import
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        yield pool
+
+def athlete_row(**overrides):
+    row = {"email": "runner@example.com", "name": "Runner", "password": "secret"}
+    row.update(overrides)
+    return row
+
+def performance_row(**overrides):
+    row = {
+        "athlete_email": "runner@example.com",
+        "test_type": "pushups",
+        "ai_score": 70,
+        "metrics": {"repetitions": 12},
+        "timestamp": "2026-03-02T10:00:00+00:00"
+    }
+    row.update(overrides)
+    return row
+
+def test_import_athletes_creates_user_and_profile(db, executor):
+    bulk_import.import_athletes(db, [athlete_row(age="15", sport="run", xp_points="50", gender="female")], executor)
+
+    user = db.query(User).filter(User.email == "runner@example.com").one()
+    assert user.password_hash.startswith("$2")
+    assert user.gender.value == "female"
+    profile = db.query(AthleteProfile).filter(AthleteProfile.user_id == user.id).one()
+    assert (profile.xp_points, profile.age, profile.sport) == (50, 15, "run")
+
+def test_reimport_without_optional_columns_keeps_profile(db, executor):
+    bulk_import.import_athletes(db, [athlete_row(age=15, sport="run", xp_points=50, location="Pune")], executor)
+    password_hash = db.query(User.password_hash).scalar()
+
+    bulk_import.import_athletes(db, [athlete_row(name="Runner Renamed", age="", password="changed")], executor)
+    db.expire_all()
+
+    user = db.query(User).one()
+    assert (user.name, user.location, user.password_hash) == ("Runner Renamed", "Pune", password_hash)
+    profile = db.query(AthleteProfile).one()
+    assert (profile.xp_points, profile.age, profile.sport) == (50, 15, "run")
+
+def test_import_athletes_collapses_duplicate_emails(db, executor):
+    bulk_import.import_athletes(db, [athlete_row(sport="run"), athlete_row(sport="swim")], executor)
+    assert db.query(AthleteProfile.sport).all() == [("swim",)]
+
+def test_invalid_athlete_rows_are_skipped_not_fatal(db, executor, capsys):
+    count, _ = bulk_import.import_athletes(db, [
+        {"email": "nopass@example.com", "name": "No Password"},
+        athlete_row(email="badgender@example.com", gender="unknown"),
+        athlete_row(email=""),
+        athlete_row(sport="run")
+    ], executor)
+
+    assert count == 1
+    assert db.query(User.email).all() == [("runner@example.com",)]
+    output = capsys.readouterr().out
+    assert "nopass@example.com" in output and "badgender@example.com" in output
+
+def test_import_does_not_turn_coaches_into_athletes(db, executor):
+    coach = User(email="coach@example.com", password_hash="x", name="Coach", role=UserRole.COACH)
+    db.add(coach)
+    db.commit()
+
+    count, _ = bulk_import.import_athletes(db, [athlete_row(email="coach@example.com", sport="run")], executor)
+
+    assert count == 0
+    assert db.query(AthleteProfile).count() == 0
+    db.refresh(coach)
+    assert (coach.name, coach.role) == ("Coach", UserRole.COACH)
+
+def test_reimporting_performances_is_idempotent(db, executor):
+    bulk_import.import_athletes(db, [athlete_row()], executor)
+
+    bulk_import.import_performances(db, [performance_row()], executor)
+    # Same instant written naive and in another time zone, twice within one batch
+    count, athlete_ids = bulk_import.import_performances(db, [
+        performance_row(timestamp="2026-03-02T10:00:00", ai_score=75),
+        performance_row(timestamp="2026-03-02T15:30:00+05:30", ai_score=80)
+    ], executor)
+
+    assert count == 1
+    assert athlete_ids == {db.query(User.id).scalar()}
+    assert db.query(PerformanceData.ai_score).all() == [(80,)]
+
+def test_reimporting_performances_keeps_unsupplied_fields(db, executor):
+    bulk_import.import_athletes(db, [athlete_row()], executor)
+    bulk_import.import_performances(db, [performance_row(feedback=json.dumps(["Nice"]))], executor)
+    bulk_import.import_performances(db, [performance_row(ai_score="")], executor)
+    db.expire_all()
+
+    performance = db.query(PerformanceData).one()
+    assert (performance.ai_score, performance.feedback) == (70, ["Nice"])
+
+def test_import_challenges_upserts_on_title(db, executor):
+    bulk_import.import_challenges(db, [{"title": "100 pushups", "test_type": "pushups", "xp_points": 20}], executor)
+    bulk_import.import_challenges(db, [{"title": "100 pushups", "test_type": "pushups", "description": "Go"}], executor)
+
+    from app.models.gamification import Challenge
+    challenge = db.query(Challenge).one()
+    assert (challenge.xp_points, challenge.description, challenge.is_active) == (20, "Go", True)
+
+def test_bulk_import_rebuilds_only_imported_athletes(db, session_factory, tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_import, "SessionLocal", session_factory)
+    other = PerformanceAggregate(athlete_id=999, test_type="pushups", period="week",
+                                 bucket_start=date(2026, 1, 5), attempts=3, scored_attempts=0,
+                                 score_sum=0.0, total_repetitions=0, cheat_count=0)
+    db.add(other)
+    db.commit()
+
+    athletes = tmp_path / "athletes.jsonl"
+    athletes.write_text(json.dumps(athlete_row(password_hash="$2b$12$hash")) + "\n")
+    performances = tmp_path / "performances.csv"
+    performances.write_text(
+        "athlete_email,test_type,ai_score,metrics,timestamp\n"
+        'runner@example.com,pushups,70,"{""repetitions"": 12}",2026-03-02T10:00:00\n'
+    )
+
+    assert bulk_import.bulk_import("athletes", str(athletes), workers=1) == 1
+    assert bulk_import.bulk_import("performances", str(performances), workers=1) == 1
+
+    db.expire_all()
+    rows = {(a.athlete_id, a.period): a.attempts for a in db.query(PerformanceAggregate)}
+    user_id = db.query(User.id).scalar()
+    assert rows == {(999, "week"): 3, (user_id, "day"): 1, (user_id, "week"): 1}
+
+    rank = db.query(AthleteCohortRank).filter(AthleteCohortRank.athlete_id == user_id).one()
+    assert (rank.test_type, rank.best_score, rank.percentile) == ("pushups", 70.0, 100.0)
+
+def make_performance(db, athlete_id=1, ai_score=50.0, metrics=None, timestamp=datetime(2026, 3, 4, 9, 0),
+                     cheat_detected=False, **fields):
+    performance = PerformanceData(
+        athlete_id=athlete_id, test_type="pushups", ai_score=ai_score,
+        metrics=metrics if metrics is not None else {"repetitions": 10},
+        timestamp=timestamp, cheat_detected=cheat_detected, **fields
+    )
+    db.add(performance)
+    db.commit()
+    return performance
+
+def test_bucket_start_uses_monday_for_weeks():
+    wednesday = datetime(2026, 3, 4, 23, 30)
+    assert performance_aggregates.bucket_start(wednesday, "day") == date(2026, 3, 4)
+    assert performance_aggregates.bucket_start(wednesday, "week") == date(2026, 3, 2)
+
+def test_apply_tolerates_missing_values():
+    aggregate = PerformanceAggregate(attempts=0, scored_attempts=0, score_sum=0.0, total_repetitions=0, cheat_count=0)
+    performance_aggregates._apply(aggregate, PerformanceData(ai_score=None, metrics={"repetitions": None}, cheat_detected=True))
+    performance_aggregates._apply(aggregate, PerformanceData(ai_score=80.0, metrics=None, cheat_detected=False))
+    performance_aggregates._apply(aggregate, PerformanceData(ai_score=60.0, metrics={"repetitions": 7}, cheat_detected=False))
+
+    assert (aggregate.attempts, aggregate.scored_attempts, aggregate.score_sum) == (3, 2, 140.0)
+    assert (aggregate.best_score, aggregate.total_repetitions, aggregate.cheat_count) == (80.0, 7, 1)
+
+def test_record_performance_matches_rebuild(db):
+    for day, score in [(2, 40.0), (4, 60.0), (10, 90.0)]:
+        performance = make_performance(db, ai_score=score, timestamp=datetime(2026, 3, day, 9, 0))
+        performance_aggregates.record_performance(db, performance)
+    incremental = {
+        (a.period, a.bucket_start): (a.attempts, a.best_score, a.score_sum)
+        for a in db.query(PerformanceAggregate)
+    }
+
+    assert performance_aggregates.rebuild_aggregates(db) == 3
+    rebuilt = {
+        (a.period, a.bucket_start): (a.attempts, a.best_score, a.score_sum)
+        for a in db.query(PerformanceAggregate)
+    }
+    assert incremental == rebuilt
+    assert rebuilt[("week", date(2026, 3, 2))] == (2, 60.0, 100.0)
+
+def test_athlete_trends_rolling_average(db):
+    for day, score in [(2, 40.0), (9, 60.0), (16, 80.0)]:
+        performance_aggregates.record_performance(db, make_performance(db, ai_score=score, timestamp=datetime(2026, 3, day)))
+
+    trends = performance_aggregates.get_athlete_trends(db, [1, 2], "pushups", "week", rolling_window=2)
+    assert trends[2] == []
+    assert [p["rolling_average_score"] for p in trends[1]] == [40.0, 50.0, 70.0]
+
+def make_athlete(db, email, sport="run", age=15, gender=None, best_score=None, location=None):
+    user = User(email=email, password_hash="x", name=email.split("@")[0], role=UserRole.ATHLETE,
+                gender=gender, location=location)
+    db.add(user)
+    db.commit()
+    db.add(AthleteProfile(user_id=user.id, sport=sport, age=age))
+    if best_score is not None:
+        db.add(PerformanceAggregate(athlete_id=user.id, test_type="pushups", period="week",
+                                    bucket_start=date(2026, 3, 2), attempts=1, scored_attempts=1,
+                                    score_sum=best_score, best_score=best_score,
+                                    total_repetitions=0, cheat_count=0))
+    db.commit()
+    return user
+
+def test_single_athlete_cohort_ranks_at_top(db):
+    make_athlete(db, "solo@example.com", sport="run", best_score=90.0)
+    assert athlete_search.rebuild_cohort_ranks(db) == 1
+
+    results = athlete_search.search_athletes(db, "pushups", min_percentile=50)
+    assert [(r["name"], r["percentile"]) for r in results] == [("solo", 100.0)]
+
+def test_cohort_percentiles_and_filters(db):
+    make_athlete(db, "low@example.com", sport="swim", age=15, gender=Gender.FEMALE, best_score=40.0)
+    make_athlete(db, "high@example.com", sport="swim", age=14, gender=Gender.FEMALE, best_score=90.0, location="Pune")
+    make_athlete(db, "senior@example.com", sport="swim", age=30, gender=Gender.FEMALE, best_score=10.0)
+    make_athlete(db, "untested@example.com", sport="swim", age=15)
+    athlete_search.rebuild_cohort_ranks(db)
+
+    results = athlete_search.search_athletes(db, "pushups", sport="swim", age_group="U16")
+    assert [(r["name"], r["percentile"]) for r in results] == [("high", 100.0), ("low", 50.0)]
+
+    results = athlete_search.search_athletes(db, "pushups", location="Pune")
+    assert [r["name"] for r in results] == ["high"]
+
+    results = athlete_search.search_athletes(db, "pushups", min_age=18)
+    assert [(r["name"], r["age_group"], r["percentile"]) for r in results] == [("senior", "SENIOR", 100.0)]
+
+def test_slope_of_series():
+    assert injury_risk._slope(np.array([5.0])) == 0.0
+    assert injury_risk._slope(np.array([1.0, 3.0, 5.0, 7.0])) == pytest.approx(2.0)
+
+def test_extract_features_counts_recent_load(db):
+    now = datetime(2026, 3, 20, tzinfo=timezone.utc)
+    make_performance(db, timestamp=now - timedelta(days=30), metrics={"repetitions": 50, "form_consistency": 10.0})
+    make_performance(db, timestamp=now - timedelta(days=3), metrics={"repetitions": 20, "form_consistency": 14.0})
+    make_performance(db, timestamp=now - timedelta(days=1), metrics={"repetitions": 30, "form_consistency": 18.0},
+                     cheat_detected=True)
+
+    features = dict(zip(injury_risk.FEATURES, injury_risk.extract_features(db, [1, 2], now)[0]))
+    assert features["form_consistency"] == pytest.approx(14.0)
+    assert features["consistency_trend"] == pytest.approx(4.0)
+    assert features["load_frequency"] == 2
+    assert features["weekly_repetitions"] == 50
+    assert features["cheat_rate"] == pytest.approx(1 / 3)
+
+def test_incremental_scoring_picks_up_sessions_leaving_the_load_window(db):
+    athlete = make_athlete(db, "load@example.com")
+    scored_at = datetime(2026, 3, 10, tzinfo=timezone.utc)
+    db.query(AthleteProfile).update({"injury_risk_updated_at": scored_at})
+    make_performance(db, athlete_id=athlete.id, timestamp=scored_at - timedelta(days=2),
+                     updated_at=scored_at - timedelta(days=2))
+
+    # Nothing new and the session still counts toward the weekly load
+    assert injury_risk.athletes_to_score(db, now=scored_at + timedelta(days=1)) == []
+    # Five days after scoring the session has aged out of the 7-day window
+    assert injury_risk.athletes_to_score(db, now=scored_at + timedelta(days=6)) == [athlete.id]
+    # New sessions are always picked up
+    make_performance(db, athlete_id=athlete.id, timestamp=scored_at + timedelta(hours=1),
+                     updated_at=scored_at + timedelta(hours=1))
+    assert injury_risk.athletes_to_score(db, now=scored_at + timedelta(days=1)) == [athlete.id]
+
+def test_incremental_scoring_picks_up_backfilled_history(db):
+    athlete = make_athlete(db, "history@example.com")
+    scored_at = datetime(2026, 3, 10, tzinfo=timezone.utc)
+    db.query(AthleteProfile).update({"injury_risk_updated_at": scored_at})
+
+    # Imported after the last run, but timestamped weeks before it
+    make_performance(db, athlete_id=athlete.id, timestamp=scored_at - timedelta(days=20),
+                     updated_at=scored_at + timedelta(hours=2))
+    assert injury_risk.athletes_to_score(db, now=scored_at + timedelta(days=1)) == [athlete.id]
+
+def test_full_scoring_includes_athletes_without_recent_sessions(db):
+    stale = make_athlete(db, "stale@example.com")
+    idle = make_athlete(db, "idle@example.com")
+    now = datetime(2026, 3, 10, tzinfo=timezone.utc)
+    make_performance(db, athlete_id=stale.id, timestamp=now - timedelta(days=200))
+
+    assert injury_risk.athletes_to_score(db, full=True, now=now) == [stale.id, idle.id]
+
+def test_rebuild_skips_implausible_submissions_like_live_path(db):
+    clean = make_performance(db, ai_score=60.0, timestamp=datetime(2026, 3, 4, 9, 0))
+    flagged = make_performance(db, ai_score=100.0, timestamp=datetime(2026, 3, 4, 10, 0),
+                               metrics={"repetitions": 40, "plausibility_flags": ["joint_teleport"]})
+    for performance in (clean, flagged):
+        performance_aggregates.record_performance(db, performance)
+    incremental = {(a.period, a.bucket_start): (a.attempts, a.best_score, a.total_repetitions)
+                   for a in db.query(PerformanceAggregate)}
+
+    assert performance_aggregates.rebuild_aggregates(db) == 2
+    rebuilt = {(a.period, a.bucket_start): (a.attempts, a.best_score, a.total_repetitions)
+               for a in db.query(PerformanceAggregate)}
+    assert incremental == rebuilt
+    assert rebuilt[("day", date(2026, 3, 4))] == (1, 60.0, 10)
+
+def test_extract_features_tolerates_null_repetitions(db):
+    now = datetime(2026, 3, 20, tzinfo=timezone.utc)
+    make_performance(db, timestamp=now - timedelta(days=2), metrics={"repetitions": None})
+    make_performance(db, timestamp=now - timedelta(days=1), metrics={"repetitions": 12})
+
+    features = injury_risk.extract_features(db, [1], now)
+    assert np.isfinite(features).all()
+    assert features[0][injury_risk.FEATURES.index("weekly_repetitions")] == 12
+    assert np.isfinite(injury_risk.InjuryRiskModel().predict(features)).all()
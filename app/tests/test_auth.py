@@ -0,0 +1,118 @@
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.user import UserRole
+from app.services import rate_limiter as rate_limiter_module
+from app.services.rate_limiter import (
+    BucketLimit, InMemoryBucketStore, RateLimiter, SQLiteBucketStore, _may_start, BUCKET_SWEEP_SECONDS
+)
+
+LIMIT = BucketLimit(capacity=10, refill_per_second=1)
+
+def make_user(user_id, role=UserRole.ATHLETE):
+    return SimpleNamespace(id=user_id, role=role)
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteBucketStore(str(tmp_path / "rate_limits.db"))
+    return InMemoryBucketStore()
+
+def test_bucket_rejects_until_refilled(store):
+    assert store.take("user:1", 10, LIMIT, now=0) == (True, 0.0)
+    allowed, retry_after = store.take("user:1", 3, LIMIT, now=1)
+    assert not allowed
+    assert retry_after == pytest.approx(2)
+    assert store.take("user:1", 3, LIMIT, now=3)[0]
+
+def test_full_idle_buckets_are_evicted():
+    store = InMemoryBucketStore()
+    store.take("user:1", 1, LIMIT, now=0)
+    store.take("user:2", 10, LIMIT, now=0)
+    store.take("user:3", 1, LIMIT, now=BUCKET_SWEEP_SECONDS)
+
+    # user:1 refilled after one second, user:2 after ten; only user:3 is still partly drained
+    assert set(store._buckets) == {"user:3"}
+
+def test_queue_is_first_come_but_skips_users_at_their_cap():
+    slots = [(1, "user:1", True), (2, "user:1", False), (3, "user:2", False), (4, "user:3", False)]
+    assert _may_start(slots, 3, per_user=1, total=4)
+    assert not _may_start(slots, 4, per_user=1, total=4)
+    assert not _may_start(slots, 3, per_user=1, total=1)
+
+def test_sqlite_slots_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / "rate_limits.db")
+    worker_a, worker_b = SQLiteBucketStore(path), SQLiteBucketStore(path)
+
+    first = worker_a.enqueue("user:1", 2, now=0)
+    second = worker_b.enqueue("user:1", 2, now=0)
+    assert worker_a.try_start(first, 1, 4, now=0)
+    assert not worker_b.try_start(second, 1, 4, now=0)
+    worker_a.release(first)
+    assert worker_b.try_start(second, 1, 4, now=0)
+    assert worker_a.in_flight() == (1, 0)
+
+def test_queued_analyses_run_in_arrival_order(monkeypatch):
+    monkeypatch.setattr(rate_limiter_module, "ANALYSIS_QUEUE_POLL_SECONDS", 0.01)
+    limiter = RateLimiter(InMemoryBucketStore())
+    user = make_user(1)
+    order = []
+
+    async def analysis(name, arrival):
+        await asyncio.sleep(arrival)
+        async with limiter.analysis_slot("process_landmarks", user, timeout=5):
+            order.append(name)
+            await asyncio.sleep(0.1)
+
+    async def run():
+        await asyncio.gather(analysis("third", 0.04), analysis("first", 0), analysis("second", 0.02))
+    asyncio.run(run())
+
+    assert order == ["first", "second", "third"]
+    assert limiter.stats()["analyses_in_flight"] == 0
+
+def test_queue_overflow_is_rejected_without_charging_tokens(monkeypatch):
+    monkeypatch.setattr(rate_limiter_module, "ANALYSIS_QUEUE_POLL_SECONDS", 0.01)
+    store = InMemoryBucketStore()
+    limiter = RateLimiter(store)
+    user = make_user(1)
+
+    async def run():
+        async with limiter.analysis_slot("process_video", user):
+            # Two requests from other workers are already waiting behind this one
+            waiting = [store.enqueue("user:1", 2, now=0) for _ in range(2)]
+            with pytest.raises(HTTPException) as rejected:
+                async with limiter.analysis_slot("process_video", user):
+                    pass
+            assert rejected.value.status_code == 429
+
+            store.release(waiting.pop())
+            with pytest.raises(HTTPException):
+                async with limiter.analysis_slot("process_video", user, timeout=0.05):
+                    pass
+    asyncio.run(run())
+
+    # Only the analysis that actually started paid its 10 tokens
+    tokens, _, _ = store._buckets["analysis:user:1"]
+    assert tokens == pytest.approx(20, abs=0.1)
+    assert limiter.throttled[("process_video", "concurrency")] == 2
+
+def test_login_attempts_from_one_address_cannot_lock_out_another(monkeypatch):
+    limiter = RateLimiter(InMemoryBucketStore())
+    monkeypatch.setattr(rate_limiter_module, "rate_limiter", limiter)
+    form = SimpleNamespace(username="Victim@example.com")
+
+    def login_from(host):
+        rate_limiter_module.login_rate_limit(SimpleNamespace(client=SimpleNamespace(host=host)), form)
+
+    for _ in range(10):
+        login_from("203.0.113.9")
+    with pytest.raises(HTTPException) as throttled:
+        login_from("203.0.113.9")
+    assert throttled.value.status_code == 429
+
+    login_from("198.51.100.7")  # The account owner is unaffected
@@ -0,0 +1,290 @@
+
+import argparse
+import csv
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.user import User, UserRole, Gender
+from app.models.athlete import AthleteProfile
+from app.models.performance import PerformanceData
+from app.models.gamification import Challenge
+from app.services.athlete_search import rebuild_cohort_ranks
+from app.services.auth import get_password_hash
+from app.services.performance_aggregates import rebuild_aggregates
+
+DEFAULT_BATCH_SIZE = 1000
+
+def read_rows(path: str) -> Iterator[dict]:
+    """Stream rows from a .csv or .jsonl file"""
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def batched(rows: Iterable[dict], batch_size: int) -> Iterator[List[dict]]:
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def _optional(value, cast):
+    """Coerce CSV strings and JSONL values alike, treating blanks as missing"""
+    if value is None or value == "":
+        return None
+    return cast(value)
+
+def _json(value):
+    return json.loads(value) if isinstance(value, str) else value
+
+def _bool(value):
+    return value.strip().lower() in ("1", "true", "yes") if isinstance(value, str) else bool(value)
+
+def _timestamp(value):
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+def _utc(value: datetime) -> datetime:
+    """Normalize to UTC-aware; naive values (input or SQLite read-back) are taken as UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def _present(record: dict) -> dict:
+    """Drop missing values so upserts never overwrite stored data with blanks"""
+    return {column: value for column, value in record.items() if value is not None}
+
+def _upsert(db: Session, table, rows: List[dict], index_elements: List[str], update_columns: List[str]):
+    """Batched INSERT ... ON CONFLICT DO UPDATE on a unique key"""
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise ValueError(f"Upserts are not supported for the {dialect} dialect")
+
+    # Rows supplying different columns need their own statement and SET clause
+    groups: Dict[Tuple[str, ...], List[dict]] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+
+    for columns, group in groups.items():
+        stmt = dialect_insert(table)
+        set_ = {column: stmt.excluded[column] for column in update_columns if column in columns}
+        if set_:
+            stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+        db.execute(stmt, group)
+
+def _insert_many(db: Session, table, rows: List[dict]):
+    """Batched INSERT, one executemany per distinct set of supplied columns"""
+    groups: Dict[Tuple[str, ...], List[dict]] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    for group in groups.values():
+        db.execute(insert(table), group)
+
+def _user_ids(db: Session, emails: Iterable[str]) -> Dict[str, int]:
+    return dict(db.query(User.email, User.id).filter(User.email.in_(set(emails))).all())
+
+def _athlete_records(row: dict) -> Tuple[dict, dict]:
+    """User and profile columns for one athlete row; raises ValueError on bad values"""
+    user = {
+        "email": row["email"],
+        "name": _optional(row.get("name"), str),
+        "password_hash": row.get("password_hash") or None,
+        "role": UserRole.ATHLETE,
+        "gender": _optional(row.get("gender"), Gender),
+        "location": _optional(row.get("location"), str)
+    }
+    profile = {
+        "age": _optional(row.get("age"), int),
+        "sport": _optional(row.get("sport"), str),
+        "xp_points": _optional(row.get("xp_points"), int)
+    }
+    return user, profile
+
+def import_athletes(db: Session, batch: List[dict], executor: ProcessPoolExecutor) -> Tuple[int, Set[int]]:
+    """Upsert athlete users and profiles keyed on email; passwords are only hashed for new users"""
+    rows = {}
+    for number, row in enumerate(batch, 1):
+        if not row.get("email"):
+            print(f"Skipping athlete row {number}: missing email")
+            continue
+        rows[row["email"]] = row  # Last row wins for duplicate emails
+
+    roles = dict(db.query(User.email, User.role).filter(User.email.in_(set(rows))).all())
+    records = {}
+    for email, row in rows.items():
+        if email in roles and roles[email] != UserRole.ATHLETE:
+            print(f"Skipping athlete {email}: existing {roles[email].value} account")
+            continue
+        if email not in roles and not (row.get("password_hash") or row.get("password")):
+            print(f"Skipping athlete {email}: new users need a password or password_hash")
+            continue
+        try:
+            records[email] = _athlete_records(row)
+        except ValueError as e:
+            print(f"Skipping athlete {email}: {e}")
+    if not records:
+        return 0, set()
+
+    new_rows = [
+        rows[email] for email, (user, _) in records.items()
+        if email not in roles and not user["password_hash"]
+    ]
+    hashes = dict(zip(
+        (row["email"] for row in new_rows),
+        executor.map(get_password_hash, (row["password"] for row in new_rows), chunksize=32)
+    ))
+
+    users = [
+        _present(dict(user, password_hash=user["password_hash"] or hashes.get(email) or ""))
+        for email, (user, _) in records.items()
+    ]
+    _upsert(db, User.__table__, users, ["email"], ["name", "gender", "location"])
+
+    user_ids = _user_ids(db, records)
+    profiles = [_present(dict(profile, user_id=user_ids[email])) for email, (_, profile) in records.items()]
+    _upsert(db, AthleteProfile.__table__, profiles, ["user_id"], ["age", "sport", "xp_points"])
+    db.commit()
+    return len(records), set()
+
+def import_performances(db: Session, batch: List[dict], executor: ProcessPoolExecutor) -> Tuple[int, Set[int]]:
+    """Insert performances, updating rows that match on (athlete, test_type, UTC timestamp)"""
+    user_ids = _user_ids(db, (row["athlete_email"] for row in batch))
+    performances = {}
+    for row in batch:
+        if row["athlete_email"] not in user_ids:
+            print(f"Skipping performance for unknown athlete {row['athlete_email']}")
+            continue
+        timestamp = _utc(_timestamp(row["timestamp"]))
+        key = (user_ids[row["athlete_email"]], row["test_type"], timestamp)
+        performances[key] = _present({  # Last row wins for duplicates within the batch
+            "athlete_id": user_ids[row["athlete_email"]],
+            "test_type": row["test_type"],
+            "raw_video_path": _optional(row.get("raw_video_path"), str),
+            "ai_score": _optional(row.get("ai_score"), float),
+            "metrics": _optional(row.get("metrics"), _json),
+            "cheat_detected": _optional(row.get("cheat_detected"), _bool),
+            "feedback": _optional(row.get("feedback"), _json),
+            "timestamp": timestamp
+        })
+    if not performances:
+        return 0, set()
+
+    # Match in Python on normalized timestamps; drivers differ in how they return time zones
+    timestamps = [key[2] for key in performances]
+    existing = {
+        (athlete_id, test_type, _utc(timestamp)): performance_id
+        for performance_id, athlete_id, test_type, timestamp in db.query(
+            PerformanceData.id, PerformanceData.athlete_id, PerformanceData.test_type, PerformanceData.timestamp
+        ).filter(
+            PerformanceData.athlete_id.in_({key[0] for key in performances}),
+            PerformanceData.timestamp >= min(timestamps),
+            PerformanceData.timestamp <= max(timestamps)
+        )
+    }
+
+    inserts = [p for key, p in performances.items() if key not in existing]
+    # Bulk updates skip onupdate defaults; bump updated_at so cached responses are refreshed
+    now = datetime.now(timezone.utc)
+    updates = [dict(p, id=existing[key], updated_at=now) for key, p in performances.items() if key in existing]
+    if inserts:
+        _insert_many(db, PerformanceData.__table__, inserts)
+    if updates:
+        db.bulk_update_mappings(PerformanceData, updates)
+    db.commit()
+    return len(performances), {key[0] for key in performances}
+
+def import_challenges(db: Session, batch: List[dict], executor: ProcessPoolExecutor) -> Tuple[int, Set[int]]:
+    """Insert challenges, updating existing ones with the same title"""
+    creator_ids = _user_ids(db, (row["created_by_email"] for row in batch if row.get("created_by_email")))
+    challenges = list({
+        row["title"]: _present({
+            "title": row["title"],
+            "description": _optional(row.get("description"), str),
+            "test_type": row["test_type"],
+            "xp_points": _optional(row.get("xp_points"), int),
+            "created_by": creator_ids.get(row.get("created_by_email")),
+            "deadline": _optional(row.get("deadline"), _timestamp),
+            "is_active": _optional(row.get("is_active"), _bool)
+        })
+        for row in batch
+    }.values())  # Last row wins for duplicate titles
+
+    existing = dict(db.query(Challenge.title, Challenge.id).filter(
+        Challenge.title.in_([c["title"] for c in challenges])
+    ).all())
+    inserts = [c for c in challenges if c["title"] not in existing]
+    updates = [dict(c, id=existing[c["title"]]) for c in challenges if c["title"] in existing]
+    if inserts:
+        _insert_many(db, Challenge.__table__, inserts)
+    if updates:
+        db.bulk_update_mappings(Challenge, updates)
+    db.commit()
+    return len(challenges), set()
+
+IMPORTERS = {
+    "athletes": import_athletes,
+    "performances": import_performances,
+    "challenges": import_challenges
+}
+
+def bulk_import(entity: str, path: str, batch_size: int = DEFAULT_BATCH_SIZE, workers: Optional[int] = None) -> int:
+    """Load a CSV/JSONL file in batches and report throughput"""
+    importer = IMPORTERS[entity]
+    db = SessionLocal()
+    total = 0
+    athlete_ids = set()
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch in batched(read_rows(path), batch_size):
+                count, touched = importer(db, batch, executor)
+                total += count
+                athlete_ids |= touched
+                elapsed = time.perf_counter() - start
+                print(f"{total} {entity} imported ({total / elapsed:.0f} rows/s)")
+
+        # Imported performances bypass incremental aggregation
+        touched = sorted(athlete_ids)
+        for i in range(0, len(touched), batch_size):
+            rebuild_aggregates(db, touched[i:i + batch_size])
+        # Cohort ranks read the aggregates and the profile's sport, age and gender
+        if touched or entity == "athletes":
+            count = rebuild_cohort_ranks(db)
+            print(f"Ranked {count} athlete/test combinations")
+    except Exception as e:
+        print(f"Error importing {entity}: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Imported {total} {entity} in {elapsed:.2f}s ({total / elapsed if elapsed else 0:.0f} rows/s)")
+    return total
+
+# Run import if this script is executed directly
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import athletes, performances or challenges")
+    parser.add_argument("entity", choices=sorted(IMPORTERS))
+    parser.add_argument("path", help="Input .csv or .jsonl file")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Password hashing processes")
+    args = parser.parse_args()
+
+    bulk_import(args.entity, args.path, args.batch_size, args.workers)
@@ -2,6 +2,7 @@
 from app.database import engine, Base, get_db
 from app.models.user import User
 from app.models.athlete import AthleteProfile
+from app.models.performance import PerformanceAggregate
 from app.models.gamification import Badge, Challenge
 from sqlalchemy.orm import Session
 import os
@@ -31,9 +32,10 @@ def init_db():
             # Add more default badges as needed
         ]
         
-        for badge in badges:
-            if not db.query(Badge).filter(Badge.name == badge.name).first():
-                db.add(badge)
+        existing = {name for (name,) in db.query(Badge.name).filter(
+            Badge.name.in_([badge.name for badge in badges])
+        )}
+        db.add_all([badge for badge in badges if badge.name not in existing])
         
         db.commit()
         print("Database initialized successfully!")
@@ -0,0 +1,71 @@
+
+import uuid
+import numpy as np
+from collections import namedtuple
+from pathlib import Path
+from typing import List, Optional
+
+# MediaPipe Pose topology: 33 landmarks, each with x, y, z and visibility
+NUM_POSE_LANDMARKS = 33
+LANDMARK_CHANNELS = 4
+LANDMARK_DTYPE = np.dtype("<f4")  # Little-endian float32 as sent by clients
+MAX_LANDMARK_FRAMES = 30 * 60 * 5  # 5 minutes at 30 fps
+
+Landmark = namedtuple("Landmark", ["x", "y", "z", "visibility"])
+
+class LandmarkFrame:
+    """Mimics MediaPipe's NormalizedLandmarkList so analysis code can consume raw arrays"""
+    __slots__ = ("landmark",)
+
+    def __init__(self, frame: np.ndarray):
+        self.landmark = [Landmark(*map(float, row)) for row in frame]
+
+def decode_landmark_array(data: bytes, frames: int, joints: int = NUM_POSE_LANDMARKS) -> np.ndarray:
+    """Decode a compact frames x joints x (x, y, z, visibility) float32 buffer"""
+    if joints != NUM_POSE_LANDMARKS:
+        raise ValueError(f"Expected {NUM_POSE_LANDMARKS} joints per frame, got {joints}")
+    if frames <= 0 or frames > MAX_LANDMARK_FRAMES:
+        raise ValueError(f"Frame count must be between 1 and {MAX_LANDMARK_FRAMES}")
+
+    expected_size = frames * joints * LANDMARK_CHANNELS * LANDMARK_DTYPE.itemsize
+    if len(data) != expected_size:
+        raise ValueError(f"Expected {expected_size} bytes of landmark data, got {len(data)}")
+
+    array = np.frombuffer(data, dtype=LANDMARK_DTYPE).reshape(frames, joints, LANDMARK_CHANNELS)
+    # Frames without a pose are sent as all-NaN; any other non-finite value is malformed
+    if not np.isfinite(array[detected_frame_mask(array)]).all():
+        raise ValueError("Landmark data contains non-finite values")
+    return array.astype(np.float32)
+
+def detected_frame_mask(array: np.ndarray) -> np.ndarray:
+    """Frames where the client reported a pose (undetected frames are sent as NaN)"""
+    return ~np.isnan(array).all(axis=(1, 2))
+
+def to_landmark_frames(array: np.ndarray) -> List[Optional[LandmarkFrame]]:
+    """Wrap each frame of a landmark array, using None for frames without a pose"""
+    mask = detected_frame_mask(array)
+    return [LandmarkFrame(frame) if detected else None for frame, detected in zip(array, mask)]
+
+def landmarks_to_array(landmarks) -> np.ndarray:
+    """Convert MediaPipe pose landmarks to a 33 x 4 array"""
+    return np.array(
+        [[lm.x, lm.y, lm.z, lm.visibility] for lm in landmarks.landmark],
+        dtype=np.float32
+    )
+
+def empty_landmark_frame() -> np.ndarray:
+    """Placeholder for frames where no pose was detected"""
+    return np.full((NUM_POSE_LANDMARKS, LANDMARK_CHANNELS), np.nan, dtype=np.float32)
+
+def save_landmark_array(array: np.ndarray, subdirectory: str = "landmarks") -> str:
+    """Store a landmark series as a compressed float16 archive and return its path"""
+    upload_dir = Path("uploads") / subdirectory
+    upload_dir.mkdir(parents=True, exist_ok=True)
+
+    file_path = upload_dir / f"{uuid.uuid4()}.npz"
+    np.savez_compressed(file_path, landmarks=array.astype(np.float16))
+    return str(file_path)
+
+def load_landmark_array(path: str) -> np.ndarray:
+    with np.load(path) as archive:
+        return archive["landmarks"].astype(np.float32)
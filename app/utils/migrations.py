@@ -0,0 +1,26 @@
+"""
+Schema checks shared by Alembic revisions.
+
+App startup still runs Base.metadata.create_all, which may already have created new tables,
+indexes and columns, so revisions only add what is missing. Offline (--sql) runs assume the
+schema from before the revision.
+"""
+from typing import List
+
+import sqlalchemy as sa
+from alembic import context, op
+
+def has_table(table: str) -> bool:
+    if context.is_offline_mode():
+        return False
+    return table in sa.inspect(op.get_bind()).get_table_names()
+
+def has_column(table: str, column: str) -> bool:
+    if not has_table(table):
+        return False
+    return column in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+def create_index_if_missing(name: str, table: str, columns: List[str], unique: bool = False):
+    if has_table(table) and name in {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(table)}:
+        return
+    op.create_index(name, table, columns, unique=unique)
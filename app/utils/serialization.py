@@ -0,0 +1,82 @@
+
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, NamedTuple, Optional
+import numpy as np
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
+def _default(obj):
+    """Encode numpy values that leak out of the analysis results"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+# Shared by GZipMiddleware and cached bodies; level 9 costs several times more CPU for a few percent
+GZIP_MINIMUM_SIZE = 1024
+GZIP_LEVEL = 5
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when available; pydantic models skip jsonable_encoder"""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            content = content.dict()
+        return dumps(content)
+
+class CachedBody(NamedTuple):
+    version: Any
+    body: bytes
+    gzipped: Optional[bytes]  # None for bodies too small to be worth compressing
+
+    def response(self, accept_encoding: str = "") -> Response:
+        """Serve the stored bytes, pre-compressed when the client accepts gzip"""
+        headers = {"Vary": "Accept-Encoding"}
+        if self.gzipped is not None and "gzip" in accept_encoding:
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=self.gzipped, media_type="application/json", headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+class SerializedBodyCache:
+    """LRU cache of serialized and gzipped response bodies, keyed by record and revision"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Any, CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version) -> Optional[CachedBody]:
+        """Cached body for this revision of the record; stale revisions miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, version, body: bytes) -> CachedBody:
+        gzipped = gzip.compress(body, compresslevel=GZIP_LEVEL) if len(body) >= GZIP_MINIMUM_SIZE else None
+        entry = CachedBody(version, body, gzipped)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
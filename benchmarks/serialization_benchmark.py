@@ -0,0 +1,73 @@
+"""
+Compare response encoding paths for analysis payloads of realistic sizes.
+
+Usage: python -m benchmarks.serialization_benchmark
+"""
+import gzip
+import json
+import random
+import time
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from app.schemas.performance import PerformanceResponse
+from app.utils.serialization import dumps, orjson, SerializedBodyCache, GZIP_LEVEL
+
+def make_payload(frames: int) -> dict:
+    """Performance record shaped like AIProcessor output for a video of `frames` frames"""
+    angles = [random.uniform(60, 180) for _ in range(frames)]
+    phases = ["top", "descending", "bottom", "ascending"]
+    return {
+        "id": 1,
+        "athlete_id": 1,
+        "test_type": "pushups",
+        "ai_score": 87.5,
+        "cheat_detected": False,
+        "timestamp": datetime.utcnow(),
+        "metrics": {
+            "elbow_angles": angles,
+            "phases": [
+                {"frame": i, "phase": phases[i % 4], "angle": angle}
+                for i, angle in enumerate(angles)
+            ],
+            "repetitions": frames // 60,
+            "current_phase": "top",
+            "average_depth": 62.3,
+            "form_consistency": 14.8
+        },
+        "feedback": ["Keep your back straight - don't let your hips sag"] * (frames // 30)
+    }
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def run(frames_options=(300, 1800, 9000), repeat: int = 50):
+    print(f"orjson available: {orjson is not None}, gzip level {GZIP_LEVEL}")
+    print(f"{'frames':>7} {'raw KB':>8} {'gzip KB':>8} {'default json ms':>15} {'fast dumps ms':>14} "
+          f"{'gzip 9 ms':>10} {'gzip ms':>8} {'cache miss ms':>13} {'cache hit ms':>12}")
+    for frames in frames_options:
+        payload = make_payload(frames)
+        model = PerformanceResponse(**payload)
+        body = dumps(model.dict())
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+        # FastAPI's default JSONResponse path vs direct orjson of the model dict
+        baseline = timed(lambda: json.dumps(jsonable_encoder(model)).encode("utf-8"), repeat)
+        fast = timed(lambda: dumps(model.dict()), repeat)
+        compress_max = timed(lambda: gzip.compress(body, compresslevel=9), repeat)
+        compress = timed(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL), repeat)
+
+        # What GET /ai/performances/{id} does per request, excluding the version lookup query
+        cache = SerializedBodyCache()
+        miss = timed(lambda: cache.set(1, frames, dumps(model.dict())).response("gzip"), repeat)
+        hit = timed(lambda: cache.get(1, frames).response("gzip"), repeat)
+
+        print(f"{frames:>7} {len(body) / 1024:>8.1f} {len(compressed) / 1024:>8.1f} "
+              f"{baseline:>15.2f} {fast:>14.2f} {compress_max:>10.2f} {compress:>8.2f} {miss:>13.2f} {hit:>12.3f}")
+
+if __name__ == "__main__":
+    run()